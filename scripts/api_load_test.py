@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HarmonicAPI Load Test
+Fires random queries at a running HarmonicAPI (or one spawned in-process
+with --spawn) from --concurrency keep-alive connections and reports
+throughput and latency percentiles (p50 / p90 / p99 / max).
+
+Stdlib asyncio client; each connection sends its next request as soon as
+the previous response has been read, so the load is closed-loop.
+
+CLI
+---
+python scripts/api_load_test.py --spawn --concurrency 32 --requests 5000 --endpoint mix
+python scripts/api_load_test.py --spawn --endpoint nearest --hot 3   # dashboard pattern, cache hits
+python scripts/api_load_test.py --host 127.0.0.1 --port 8080 --token "$HARMONIC_API_TOKEN" --endpoint nearest
+"""
+
+from __future__ import annotations
+import os, time, asyncio, secrets, argparse
+from urllib.parse import urlencode
+import numpy as np
+
+from api_structure_prepped import DEFAULT_CATALOG, ROUTES, TOKEN_ENV, HarmonicAPI, read_catalog
+from query_cache import QueryCache
+
+
+def random_target(rng: np.random.Generator, endpoint: str) -> str:
+    kind = rng.choice(ROUTES) if endpoint == "mix" else endpoint
+    lat, lon = float(np.degrees(np.arcsin(rng.uniform(-1, 1)))), float(rng.uniform(-180, 180))
+    if kind == "bearing":
+        params = {"lat1": lat, "lon1": lon, "lat2": float(rng.uniform(-90, 90)), "lon2": float(rng.uniform(-180, 180))}
+    elif kind == "knearest":
+        params = {"lat": lat, "lon": lon, "k": 5}
+    elif kind == "radius":
+        params = {"lat": lat, "lon": lon, "radius_km": 500}
+    else:
+        params = {"lat": lat, "lon": lon}
+    return f"/{kind}?{urlencode(params)}"
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host: str, port: int, token: str, targets: list[str], latencies: list, errors: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            request = (f"GET {target} HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Authorization: Bearer {token}\r\n\r\n").encode("latin-1")
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, token: str, n_requests: int = 5000, concurrency: int = 32,
+                    endpoint: str = "mix", seed: int = 0, hot: int = 0) -> dict:
+    """
+    Run the load and return throughput and latency percentiles in
+    milliseconds. With hot > 0 every request is one of `hot` fixed queries.
+    """
+    rng = np.random.default_rng(seed)
+    if hot > 0:
+        pool = [random_target(rng, endpoint) for _ in range(hot)]
+        targets = [pool[i] for i in rng.integers(0, hot, n_requests)]
+    else:
+        targets = [random_target(rng, endpoint) for _ in range(n_requests)]
+    latencies, errors = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, token, targets[i::concurrency], latencies, errors)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(ms),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_s": len(ms) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Load test for the HarmonicAPI service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--token", default=os.environ.get(TOKEN_ENV))
+    ap.add_argument("--spawn", action="store_true", help="Start a HarmonicAPI in-process on a free port")
+    ap.add_argument("--catalog", nargs="+", default=[DEFAULT_CATALOG], help="Catalog for --spawn")
+    ap.add_argument("--endpoint", choices=ROUTES + ("mix",), default="mix")
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--hot", type=int, default=0, help="Draw every request from this many fixed queries")
+    args = ap.parse_args(argv)
+
+    async def run() -> dict:
+        host, port, token = args.host, args.port, args.token
+        server = None
+        if args.spawn:
+            token = token or secrets.token_urlsafe(24)
+            catalog = read_catalog(args.catalog)
+            server = await HarmonicAPI(token, catalog, QueryCache()).serve(host, 0)
+            port = server.sockets[0].getsockname()[1]
+            print(f"✅ Spawned HarmonicAPI with {len(catalog):,} sites on port {port}")
+        elif not token:
+            raise ValueError(f"--token or ${TOKEN_ENV} is required")
+        try:
+            return await load_test(host, port, token, args.requests, args.concurrency, args.endpoint, args.seed,
+                                   args.hot)
+        finally:
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+
+    try:
+        r = asyncio.run(run())
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    print(f"🔍 {r['requests']:,} requests ({args.endpoint}) over {args.concurrency} connections "
+          f"in {r['seconds']:.2f} s: {r['requests_per_s']:,.0f} req/s, {r['errors']} errors")
+    print(f"✅ latency p50 {r['p50_ms']:.2f} ms | p90 {r['p90_ms']:.2f} ms | "
+          f"p99 {r['p99_ms']:.2f} ms | max {r['max_ms']:.2f} ms")
+    return 0 if r["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,690 @@
-# Placeholder for future API endpoint routing logic
-# Includes structure for secure API token verification and modular data access
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HarmonicAPI — asyncio HTTP service for codex site queries
+Loads the site catalog once, builds a SiteIndex (nearest_site_lookup.py)
+and answers nearest / k-nearest / radius / bearing queries over HTTP/1.1
+with keep-alive. Stdlib only: asyncio streams, json, hmac.
+
+Every connection is its own task, so requests are served concurrently.
+Single queries are answered inline on the event loop: the snapshot keeps
+its rows as ready JSON records, and SiteIndex.*_positions returns NumPy
+indices and distances in well under a millisecond, so no DataFrame is
+built per request and no thread hop (which would only queue on the GIL)
+is paid. Queries that can grow large -- k above INLINE_MAX_K, radius_km
+above INLINE_MAX_RADIUS_KM -- and bulk batches run in the default thread
+pool (asyncio.to_thread) so they never stall the event loop.
+
+The catalog, its index and its version (a content hash) form one
+read-only CatalogSnapshot. A CatalogWatcher thread polls the catalog
+files (CSV, Parquet or the modeler script) and, when they change, reads
+and indexes the new catalog in the background and swaps the snapshot
+reference in one assignment. Each request reads the reference once and
+answers entirely from that snapshot, so in-flight requests are never
+blocked or mixed across versions. Every response names its version: an
+X-Catalog-Version header, plus "version" in JSON bodies.
+
+Bulk queries (POST /bulk) take a request body of newline-delimited JSON
+points -- {"lat": .., "lon": ..} objects or [lat, lon] arrays (the
+parameters of the GET query; k / radius_km may also come from the query
+string), with Content-Length or chunked transfer encoding -- and stream the answers back
+with chunked transfer encoding while the body is still being read: every
+BULK_BATCH points are parsed, answered in one vectorized call
+(SiteIndex.*_many, geodesy.inverse) and written out, and the next
+batch is only read once the socket has drained. Memory therefore stays at
+one batch whatever the request size, and a slow client throttles the
+computation instead of growing buffers. Results are NDJSON lines
+{"point": i, "result": ...} (or {"point": i, "error": ...} for a bad
+point), or an Arrow IPC stream with format=arrow (pyarrow required) in
+long form: one row per (point, site) with a point column.
+
+Single queries go through a QueryCache (query_cache.py) keyed on the
+catalog version, the query kind and the arguments with coordinates
+rounded to --cache-decimals places; it evicts least recently used
+results beyond --cache-size entries, optionally expires them after
+--cache-ttl seconds, and is invalidated whenever a catalog is loaded.
+Dashboards polling the same handful of sites are then answered without
+touching the index. --cache-size 0 disables it.
+
+Authentication: "Authorization: Bearer <token>" (or X-API-Token), checked
+with hmac.compare_digest in constant time. The token comes from --token or
+$HARMONIC_API_TOKEN; without one a random token is generated and printed.
+
+Endpoints (GET, JSON responses)
+---------
+/health                                  : no auth; catalog size and version, cache counters
+/nearest?lat=&lon=                       : nearest site
+/knearest?lat=&lon=&k=5                  : k nearest sites, nearest first
+/radius?lat=&lon=&radius_km=             : sites within radius_km, nearest first
+/bearing?lat1=&lon1=&lat2=&lon2=         : WGS84 distance, forward and back azimuth
+POST /bulk?query=nearest&format=ndjson   : one of the queries above for every body line
+                                           (format: ndjson | arrow)
+
+CLI
+---
+python scripts/api_structure_prepped.py --catalog data/site_coordinates.csv --port 8080
+python scripts/api_structure_prepped.py --catalog forts pyramids nodes --token "$HARMONIC_API_TOKEN"
+python scripts/api_structure_prepped.py --catalog data/sites.parquet --watch-interval 5
+python scripts/api_load_test.py --spawn --concurrency 32 --requests 5000   # p50/p99 latency
+curl -H "Authorization: Bearer $HARMONIC_API_TOKEN" --data-binary @points.ndjson \
+  "http://127.0.0.1:8080/bulk?query=knearest&k=3"
+"""
+
+from __future__ import annotations
+import io, os, json, hmac, time, asyncio, hashlib, secrets, argparse, threading
+from dataclasses import dataclass
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+
+from distance_matrix import MODELER_CATALOGS, MODELER_PATH, load_catalog
+from geodesy import inverse
+from nearest_site_lookup import SiteIndex
+from query_cache import DEFAULT_DECIMALS, DEFAULT_MAX_ENTRIES, MISSING, QueryCache
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "site_coordinates.csv")
+TOKEN_ENV = "HARMONIC_API_TOKEN"
+MAX_K = 1000
+INLINE_MAX_K = 32
+INLINE_MAX_RADIUS_KM = 1000.0
+MAX_BODY_BYTES = 1 << 20
+ROUTES = ("nearest", "knearest", "radius", "bearing")
+BULK_BATCH = 1024
+BULK_READ_BYTES = 1 << 16
+BULK_FORMATS = {"ndjson": "application/x-ndjson", "arrow": "application/vnd.apache.arrow.stream"}
+RANGES = {"lat": (-90, 90), "lon": (-180, 180), "lat1": (-90, 90), "lon1": (-180, 180),
+          "lat2": (-90, 90), "lon2": (-180, 180)}
+BEARING_FIELDS = ("distance_km", "azimuth", "back_azimuth")
+
+
+class APIError(Exception):
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(frame: pd.DataFrame) -> list[dict]:
+    """DataFrame rows as JSON-ready dicts (NaN -> null)."""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _float(params: dict, name: str, lo: float = -np.inf, hi: float = np.inf) -> float:
+    try:
+        value = float(params[name])
+    except KeyError:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"missing parameter: {name}") from None
+    except (TypeError, ValueError):
+        raise APIError(HTTPStatus.BAD_REQUEST, f"parameter {name} must be a number") from None
+    if not lo <= value <= hi:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"parameter {name} must be in [{lo}, {hi}]")
+    return value
+
+
+def read_catalog(sources: list[str]) -> pd.DataFrame:
+    """Concatenated site table of CSV / Parquet paths and modeler dict names."""
+    return pd.concat([load_catalog(src) for src in sources], ignore_index=True)
+
+
+def catalog_version(catalog: pd.DataFrame) -> str:
+    """Content hash of a catalog (columns and values), stable across processes."""
+    digest = hashlib.sha1(",".join(map(str, catalog.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(catalog, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def _sites(records: list[dict], idx: np.ndarray, dist: np.ndarray) -> list[dict]:
+    """Site records idx with their Distance_km, as new dicts."""
+    return [{**records[i], "Distance_km": float(d)} for i, d in zip(idx.tolist(), dist.tolist())]
+
+
+def _point_names(kind: str) -> tuple[str, ...]:
+    return ("lat1", "lon1", "lat2", "lon2") if kind == "bearing" else ("lat", "lon")
+
+
+async def _body_lines(reader: asyncio.StreamReader, headers: dict):
+    """Lines of a request body (Content-Length or chunked), BULK_READ_BYTES at a time as they arrive."""
+    chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+    remaining = 0 if chunked else int(headers.get("content-length") or 0)
+    pending = b""
+    while True:
+        if remaining == 0:
+            if not chunked:
+                break
+            remaining = int((await reader.readline()).split(b";")[0], 16)
+            if remaining == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                break
+        data = await reader.read(min(remaining, BULK_READ_BYTES))
+        if not data:
+            raise asyncio.IncompleteReadError(pending, remaining)
+        remaining -= len(data)
+        if chunked and remaining == 0:
+            await reader.readexactly(2)  # CRLF closing the chunk
+        *lines, pending = (pending + data).split(b"\n")
+        if len(pending) > MAX_BODY_BYTES:
+            raise ValueError("bulk line too long")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+class _ArrowStream:
+    """Incremental Arrow IPC stream; every call returns the bytes written since the last one."""
+
+    def __init__(self, schema: "pa.Schema"):
+        self.schema = schema
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, schema)
+
+    def _take(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def write(self, rows: list[dict]) -> bytes:
+        if rows:
+            self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        return self._take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._take()
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One catalog generation: table, JSON rows, spatial index and content version, never modified."""
+    catalog: pd.DataFrame
+    records: list[dict]
+    index: SiteIndex
+    version: str
+    loaded_at: float
+
+    @classmethod
+    def build(cls, catalog: pd.DataFrame) -> "CatalogSnapshot":
+        index = SiteIndex(catalog.reset_index(drop=True))
+        return cls(index.data, _records(index.data), index, catalog_version(index.data), time.time())
+
+
+class CatalogWatcher:
+    """
+    Polls the catalog source files (mtime and size) every `interval`
+    seconds from a daemon thread. A change is acted on once the files have
+    stayed the same for one more poll, so half-written files are skipped;
+    the catalog is then read and indexed in this thread and swapped in with
+    HarmonicAPI.swap(), so the event loop never waits for a rebuild. A
+    catalog that fails to load leaves the current generation serving and
+    is retried on the next change.
+    """
+
+    def __init__(self, api: "HarmonicAPI", sources: list[str], interval: float = 2.0):
+        self.api = api
+        self.sources = list(sources)
+        self.interval = interval
+        self.paths = sorted({MODELER_PATH if src in MODELER_CATALOGS else os.path.abspath(src) for src in sources})
+        self.reloads = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def signature(self) -> tuple:
+        sig = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def reload(self) -> CatalogSnapshot | None:
+        """Read and index the sources; swap them in if the content changed (returns the new snapshot)."""
+        snapshot = CatalogSnapshot.build(read_catalog(self.sources))
+        if snapshot.version == self.api.version:
+            return None
+        self.reloads += 1
+        return self.api.swap(snapshot)
+
+    def _run(self) -> None:
+        loaded = seen = self.signature()
+        while not self._stop.wait(self.interval):
+            current = self.signature()
+            if current != seen:  # still being written: wait for one quiet poll
+                seen = current
+                continue
+            if current == loaded:
+                continue
+            loaded = current
+            try:
+                snapshot = self.reload()
+            except (OSError, ValueError, KeyError, ImportError) as e:
+                self.errors += 1
+                print(f"❌ Catalog reload failed, still serving version {self.api.version}: {e}")
+                continue
+            if snapshot is not None:
+                print(f"✅ Catalog reloaded: version {snapshot.version}, {len(snapshot.index):,} sites")
+
+    def start(self) -> "CatalogWatcher":
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
 class HarmonicAPI:
-    def __init__(self, token):
-        self.token = token
 
-    def authenticate(self):
-        return self.token == "secure_example_token"
+    def __init__(self, token: str, catalog: pd.DataFrame | None = None, cache: QueryCache | None = None):
+        if not token:
+            raise ValueError("HarmonicAPI needs a non-empty token")
+        self._token = token.encode("utf-8")
+        self.snapshot = None
+        self.cache = cache
+        if catalog is not None:
+            self.load(catalog)
+
+    # The current generation; a request reads self.snapshot once and uses that object throughout.
+    catalog = property(lambda self: self.snapshot.catalog)
+    index = property(lambda self: self.snapshot.index)
+    version = property(lambda self: self.snapshot.version if self.snapshot is not None else None)
+
+    def load(self, catalog: pd.DataFrame) -> CatalogSnapshot:
+        """Index a catalog (Name, Latitude, Longitude, ...) and swap it in; see swap()."""
+        return self.swap(CatalogSnapshot.build(catalog))
+
+    def swap(self, snapshot: CatalogSnapshot) -> CatalogSnapshot:
+        """
+        Make snapshot the current generation with a single reference
+        assignment: requests already running keep the snapshot they started
+        with, new ones see the new one, nobody waits. The cache is
+        invalidated when the version changes.
+        """
+        previous, self.snapshot = self.snapshot, snapshot
+        if self.cache is not None and previous is not None and previous.version != snapshot.version:
+            self.cache.invalidate()
+        return snapshot
+
+    def authenticate(self, presented: str | None) -> bool:
+        """Constant-time comparison of a presented token with the configured one."""
+        if presented is None:
+            return False
+        return hmac.compare_digest(presented.encode("utf-8"), self._token)
+
+    # --- Queries ---------------------------------------------------------------
+
+    def get_nearest_site(self, lat: float, lon: float) -> dict:
+        return self.run_query("nearest", (lat, lon))
+
+    def get_k_nearest(self, lat: float, lon: float, k: int) -> list[dict]:
+        return self.run_query("knearest", (lat, lon, k))
+
+    def get_within(self, lat: float, lon: float, radius_km: float) -> list[dict]:
+        return self.run_query("radius", (lat, lon, radius_km))
+
+    @staticmethod
+    def get_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> dict:
+        distance_km, azimuth, back_azimuth = inverse(lat1, lon1, lat2, lon2)
+        return {"distance_km": float(distance_km), "azimuth": float(azimuth),
+                "back_azimuth": float(back_azimuth)}
+
+    @staticmethod
+    def parse_query(kind: str, params: dict) -> tuple:
+        """Validated arguments of one query: (lat, lon[, k | radius_km]) or (lat1, lon1, lat2, lon2)."""
+        if kind not in ROUTES:
+            raise APIError(HTTPStatus.NOT_FOUND, f"unknown query: {kind}")
+        args = tuple(_float(params, name, *RANGES[name]) for name in _point_names(kind))
+        if kind == "knearest":
+            return args + (int(_float(params, "k", 1, MAX_K)) if "k" in params else 5,)
+        if kind == "radius":
+            return args + (_float(params, "radius_km", 0, 20040),)
+        return args
+
+    def run_query(self, kind: str, args: tuple, snapshot: CatalogSnapshot | None = None):
+        """Run one parsed query (blocking) on snapshot (default: the current one)."""
+        if kind == "bearing":
+            return self.get_bearing(*args)
+        snapshot = snapshot or self.snapshot
+        if kind == "nearest":
+            sites = _sites(snapshot.records, *snapshot.index.k_nearest_positions(*args, 1))
+            return sites[0] if sites else None
+        if kind == "knearest":
+            return _sites(snapshot.records, *snapshot.index.k_nearest_positions(*args))
+        return _sites(snapshot.records, *snapshot.index.within_positions(*args))
+
+    @staticmethod
+    def is_inline(kind: str, args: tuple) -> bool:
+        """Whether a parsed query is cheap enough to answer on the event loop."""
+        if kind == "knearest":
+            return args[2] <= INLINE_MAX_K
+        if kind == "radius":
+            return args[2] <= INLINE_MAX_RADIUS_KM
+        return True
+
+    async def _run(self, kind: str, args: tuple, snapshot: CatalogSnapshot):
+        if self.is_inline(kind, args):
+            return self.run_query(kind, args, snapshot)
+        return await asyncio.to_thread(self.run_query, kind, args, snapshot)
+
+    def query(self, kind: str, params: dict):
+        """Validate the parameters of one query and run it (blocking)."""
+        return self.run_query(kind, self.parse_query(kind, params))
+
+    async def cached_query(self, kind: str, params: dict, snapshot: CatalogSnapshot):
+        """
+        Run one query on snapshot (inline or in a worker thread, see
+        is_inline), through the cache when there is one. Cached queries run on the rounded key arguments, so a
+        result never depends on which of two equal-at-precision requests
+        came first.
+        """
+        args = self.parse_query(kind, params)
+        if self.cache is None:
+            return await self._run(kind, args, snapshot)
+        key = self.cache.key(snapshot.version, kind, args)
+        result = self.cache.get(key)
+        if result is MISSING:
+            result = await self._run(kind, key[2], snapshot)
+            self.cache.put(key, result)
+        return result
 
-    def get_nearest_site(self, lat, lon, dataset):
-        # Logic for processing API request
+    def query_batch(self, kind: str, points: list[dict | None], snapshot: CatalogSnapshot | None = None) -> list:
+        """
+        One query per point (None for an unparseable point); the result of
+        every point, or the APIError it failed with. Valid points are
+        answered in one vectorized call per distinct k / radius_km.
+        """
+        out = [APIError(HTTPStatus.BAD_REQUEST, "point must be a JSON object or array")] * len(points)
+        valid, rows = [], []
+        for i, point in enumerate(points):
+            if point is None:
+                continue
+            try:
+                rows.append(self.parse_query(kind, point))
+            except APIError as e:
+                out[i] = e
+                continue
+            valid.append(i)
+        if not valid:
+            return out
+        snapshot = snapshot or self.snapshot
+        index = snapshot.index
+        valid, rows = np.asarray(valid), np.asarray(rows).T
+        if kind == "bearing":
+            for i, row in zip(valid, zip(*inverse(*rows))):
+                out[i] = dict(zip(BEARING_FIELDS, map(float, row)))
+            return out
+        if kind == "nearest":
+            idx, dist = index.nearest_many(*rows)
+            for i, site in zip(valid, _sites(snapshot.records, idx, dist)):
+                out[i] = site
+            return out
+        for value in np.unique(rows[2]):
+            group = rows[2] == value
+            lat, lon = rows[0][group], rows[1][group]
+            if kind == "knearest":
+                idx, dist = index.k_nearest_many(lat, lon, int(value))
+                sites = _sites(snapshot.records, idx.ravel(), dist.ravel())
+                per_point = [sites[p * idx.shape[1]:(p + 1) * idx.shape[1]] for p in range(lat.size)]
+            else:
+                point, idx, dist = index.within_many(lat, lon, value)
+                sites = _sites(snapshot.records, idx, dist)
+                bounds = np.searchsorted(point, np.arange(lat.size + 1))
+                per_point = [sites[bounds[p]:bounds[p + 1]] for p in range(lat.size)]
+            for i, result in zip(valid[group], per_point):
+                out[i] = result
+        return out
+
+    @staticmethod
+    def bulk_schema(kind: str, catalog: pd.DataFrame) -> "pa.Schema":
+        """Arrow schema of the long-form bulk results of one query kind."""
+        head = [pa.field("point", pa.int64()), pa.field("error", pa.string())]
+        if kind == "bearing":
+            return pa.schema(head + [pa.field(name, pa.float64()) for name in BEARING_FIELDS])
+        sites = pa.Schema.from_pandas(catalog, preserve_index=False).remove_metadata()
+        return pa.schema(head + list(sites) + [pa.field("Distance_km", pa.float64())])
+
+    def _bulk_chunk(self, kind: str, params: dict, start: int, lines: list[bytes],
+                    arrow: _ArrowStream | None, snapshot: CatalogSnapshot) -> bytes:
+        """Parse, answer and encode one batch of bulk lines (runs in a worker thread)."""
+        names = _point_names(kind)
+        points = []
+        for line in lines:
+            try:
+                value = json.loads(line)
+            except ValueError:
+                value = None
+            if isinstance(value, list):
+                value = dict(zip(names, value))
+            points.append({**params, **value} if isinstance(value, dict) else None)
+        results = self.query_batch(kind, points, snapshot)
+        if arrow is None:
+            return "".join(
+                json.dumps({"point": i, "error": str(r)} if isinstance(r, APIError) else {"point": i, "result": r},
+                           default=_json_default) + "\n"
+                for i, r in enumerate(results, start)).encode("utf-8")
+        rows = []
+        for i, r in enumerate(results, start):
+            if isinstance(r, APIError):
+                rows.append({"point": i, "error": str(r)})
+            else:
+                rows.extend({"point": i, **site} for site in (r if isinstance(r, list) else [r]))
+        return arrow.write(rows)
+
+    # --- HTTP ------------------------------------------------------------------
+
+    def _authorize(self, headers: dict) -> None:
+        auth = headers.get("authorization", "")
+        token = auth[7:] if auth.lower().startswith("bearer ") else headers.get("x-api-token")
+        if not self.authenticate(token):
+            raise APIError(HTTPStatus.UNAUTHORIZED, "invalid or missing API token")
+
+    async def dispatch(self, method: str, target: str, headers: dict, body: bytes) -> tuple[HTTPStatus, dict]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        snapshot = self.snapshot
+        if path == "/health":
+            return HTTPStatus.OK, {"status": "ok", "version": snapshot.version, "sites": len(snapshot.index),
+                                   "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(snapshot.loaded_at)),
+                                   "cache": self.cache.stats() if self.cache is not None else None}
+        kind = path.lstrip("/")
+        if kind not in ROUTES:
+            raise APIError(HTTPStatus.NOT_FOUND, f"no route for {path}")
+        if method != "GET":
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        self._authorize(headers)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        result = await self.cached_query(kind, params, snapshot)
+        return HTTPStatus.OK, {"query": kind, "version": snapshot.version, "result": result}
+
+    async def stream_bulk(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                          target: str, headers: dict) -> bool:
+        """
+        Answer POST /bulk while its body is read: BULK_BATCH lines at a
+        time, each batch computed in a worker thread and written as one
+        HTTP chunk, the next batch read only after the socket drained.
+        Raises APIError before anything is written for a bad request.
+        An unexpected error mid-stream still ends the chunked body (with
+        a final {"error": ...} line for NDJSON); False is then returned
+        and the connection must close, its request body left unread.
+        """
+        if method != "POST":
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on /bulk")
+        self._authorize(headers)
+        params = {k: v[-1] for k, v in parse_qs(urlsplit(target).query).items()}
+        kind = params.pop("query", "nearest")
+        fmt = params.pop("format", "ndjson")
+        if kind not in ROUTES:
+            raise APIError(HTTPStatus.BAD_REQUEST, f"unknown query: {kind}")
+        if fmt not in BULK_FORMATS:
+            raise APIError(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(BULK_FORMATS)}")
+        if fmt == "arrow" and pa is None:
+            raise APIError(HTTPStatus.NOT_IMPLEMENTED, "format=arrow needs pyarrow")
+        snapshot = self.snapshot
+        arrow = _ArrowStream(self.bulk_schema(kind, snapshot.catalog)) if fmt == "arrow" else None
+
+        writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: {BULK_FORMATS[fmt]}\r\n"
+                      f"X-Catalog-Version: {snapshot.version}\r\n"
+                      "Transfer-Encoding: chunked\r\n\r\n").encode("latin-1"))
+
+        async def send(data: bytes) -> None:
+            if data:
+                writer.write(f"{len(data):X}\r\n".encode("latin-1") + data + b"\r\n")
+                await writer.drain()
+
+        batch, start, complete = [], 0, True
+        try:
+            async for line in _body_lines(reader, headers):
+                if line.strip():
+                    batch.append(line)
+                if len(batch) == BULK_BATCH:
+                    await send(await asyncio.to_thread(self._bulk_chunk, kind, params, start, batch, arrow,
+                                                      snapshot))
+                    start, batch = start + len(batch), []
+            if batch:
+                await send(await asyncio.to_thread(self._bulk_chunk, kind, params, start, batch, arrow,
+                                                  snapshot))
+            if arrow is not None:
+                await send(arrow.close())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:  # headers already sent: end the body instead of cutting it off
+            complete = False
+            if arrow is None:
+                await send((json.dumps({"error": type(e).__name__}) + "\n").encode("utf-8"))
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return complete
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                if urlsplit(target).path.rstrip("/") == "/bulk":
+                    try:
+                        complete = await self.stream_bulk(reader, writer, method, target, headers)
+                    except APIError as e:  # body left unread: answer and close
+                        await self._respond(writer, e.status, {"error": str(e)}, False)
+                        break
+                    if not (keep_alive and complete):
+                        break
+                    continue
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"},
+                                        False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.dispatch(method, target, headers, body)
+                except APIError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:  # keep serving other requests
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": type(e).__name__}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool) -> None:
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        version = f"X-Catalog-Version: {payload['version']}\r\n" if "version" in payload else ""
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n" + version +
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="HarmonicAPI HTTP service for codex site queries.")
+    ap.add_argument("--catalog", nargs="+", default=[DEFAULT_CATALOG],
+                    help="Site CSV path(s) and/or modeler dicts (nodes, geomagnetics, pyramids, forts)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--token", default=os.environ.get(TOKEN_ENV), help=f"API token (default: ${TOKEN_ENV})")
+    ap.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                    help="Cached query results (LRU); 0 disables the cache")
+    ap.add_argument("--watch-interval", type=float, default=2.0,
+                    help="Seconds between checks of the catalog files for changes; 0 disables reloading")
+    ap.add_argument("--cache-decimals", type=int, default=DEFAULT_DECIMALS,
+                    help="Coordinate rounding of cache keys, in decimal places")
+    ap.add_argument("--cache-ttl", type=float, default=None,
+                    help="Seconds a cached result stays valid (default: until evicted or the catalog changes)")
+    args = ap.parse_args(argv)
+    if args.cache_ttl is not None and args.cache_ttl <= 0:
+        ap.error("--cache-ttl must be positive")
+
+    token = args.token
+    if not token:
+        token = secrets.token_urlsafe(24)
+        print(f"✅ No token configured; generated one for this run: {token}")
+    try:
+        catalog = read_catalog(args.catalog)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    cache = QueryCache(args.cache_size, args.cache_decimals, args.cache_ttl) if args.cache_size > 0 else None
+    api = HarmonicAPI(token, catalog, cache)
+    print(f"✅ Indexed {len(api.index):,} sites from {', '.join(args.catalog)} (version {api.version})")
+    if args.watch_interval > 0:
+        CatalogWatcher(api, args.catalog, args.watch_interval).start()
+
+    async def run() -> None:
+        server = await api.serve(args.host, args.port)
+        print(f"🔍 HarmonicAPI listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
         pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
-from geopy.distance import geodesic
-from math import atan2, degrees, radians, sin, cos
+import numpy as np
+
+from geodesy import KM_PER_MILE, inverse
 
 # Define coordinates
 meadow_house = (44.4300, -72.6600)         # Approximate Meadow House Observatory (Vermont)
@@ -7,36 +8,22 @@ patio_bonito = (1.1600, -72.6600)          # Patio Bonito / CO41 (Equatorial Zon
 co42 = (10.4219, -72.6620)                 # Trihedral Basin Site / CO42
 monte_verde = (-39.3172, -73.2265)         # Monte Verde region (Chile)
 
-# Function to calculate azimuth (initial bearing)
-def calculate_azimuth(coord1, coord2):
-    lat1, lon1 = map(radians, coord1)
-    lat2, lon2 = map(radians, coord2)
-    dlon = lon2 - lon1
-    x = sin(dlon) * cos(lat2)
-    y = cos(lat1)*sin(lat2) - sin(lat1)*cos(lat2)*cos(dlon)
-    initial_bearing = atan2(x, y)
-    return (degrees(initial_bearing) + 360) % 360
-
-# Calculate azimuths and distances
-azimuth_MHO_to_PB = calculate_azimuth(meadow_house, patio_bonito)
-distance_MHO_to_PB = geodesic(meadow_house, patio_bonito).miles
-
-azimuth_MVO_to_MHO = calculate_azimuth(monte_verde, meadow_house)
-distance_MVO_to_MHO = geodesic(monte_verde, meadow_house).miles
+# Pairs to measure: name -> (from, to)
+pairs = {
+    "MHO_to_PB": (meadow_house, patio_bonito),
+    "MVO_to_MHO": (monte_verde, meadow_house),
+    "MHO_to_CO42": (meadow_house, co42),
+    "PB_to_CO42": (patio_bonito, co42),
+}
 
-azimuth_MHO_to_CO42 = calculate_azimuth(meadow_house, co42)
-distance_MHO_to_CO42 = geodesic(meadow_house, co42).miles
+# Calculate WGS84 azimuths (initial bearing) and distances for all pairs at once
+(lat1, lon1), (lat2, lon2) = np.array(list(pairs.values())).transpose(1, 2, 0)
+distance_km, azimuth, _ = inverse(lat1, lon1, lat2, lon2)
+distance_mi = distance_km / KM_PER_MILE
 
-azimuth_PB_to_CO42 = calculate_azimuth(patio_bonito, co42)
-distance_PB_to_CO42 = geodesic(patio_bonito, co42).miles
+results = {}
+for name, az, mi in zip(pairs, azimuth, distance_mi):
+    results[f"azimuth_{name}"] = float(az)
+    results[f"distance_{name}"] = float(mi)
 
-{
-    "azimuth_MHO_to_PB": azimuth_MHO_to_PB,
-    "distance_MHO_to_PB": distance_MHO_to_PB,
-    "azimuth_MVO_to_MHO": azimuth_MVO_to_MHO,
-    "distance_MVO_to_MHO": distance_MVO_to_MHO,
-    "azimuth_MHO_to_CO42": azimuth_MHO_to_CO42,
-    "distance_MHO_to_CO42": distance_MHO_to_CO42,
-    "azimuth_PB_to_CO42": azimuth_PB_to_CO42,
-    "distance_PB_to_CO42": distance_PB_to_CO42,
-}
\ No newline at end of file
+print(results)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Corridor Proximity Queries
+Every site within a distance band of a meridian or an arbitrary great
+circle, with its signed cross-track distance. The 72.66°W, 31.33°E,
+107.1°E and 168°W corridors drawn by geodetic-codex-site-modeler.py are
+built in (MODELER_CORRIDORS).
+
+CorridorIndex is built once per catalog and prunes before measuring:
+
+- meridians : sites are kept sorted by longitude and latitude; only the
+              longitude band that can lie within the width at latitudes
+              below a cutoff, plus the polar caps above it, are measured
+              (two searchsorted lookups each).
+- great circles : one matrix-vector product gives every site's distance
+              to the circle's plane, |p . n| = sin(cross-track angle); only
+              sites inside the slab sin(width) are measured.
+
+Distances are on the mean-radius sphere (geodesy.EARTH_R_KM). A meridian
+corridor is the half great circle drawn on the maps (pole to pole through
+the given longitude); full_circle=True adds its antimeridian half.
+Cross_km is positive east of a meridian and right of the direction of
+travel along a great circle; Along_km is measured along the circle from
+its first defining point.
+
+Inputs
+------
+- --catalog: CSV / Parquet paths and/or modeler dicts (nodes, geomagnetics, pyramids, forts)
+
+Outputs
+-------
+- per-corridor site counts on stdout
+- --out: CSV of every matching site (Corridor, Name, ..., Cross_km, Distance_km[, Along_km])
+
+CLI
+---
+python scripts/corridor_query.py --catalog forts pyramids nodes geomagnetics --width-km 250
+python scripts/corridor_query.py --catalog forts --meridian -72.66 --great-circle 29.98,31.13,-13.16,-72.55 --out hits.csv
+python scripts/corridor_query.py --benchmark 200000
+"""
+
+from __future__ import annotations
+import time, argparse
+import numpy as np
+import pandas as pd
+
+from distance_matrix import MODELER_CATALOGS, load_catalog
+from geodesy import EARTH_R_KM, great_circle_pole, pole_from_azimuth, to_unit_vectors
+
+MODELER_CORRIDORS = {
+    "72.66°W (MHO, CLO, CO, SO, MVO)": -72.66,
+    "31.33°E (Giza Plateau | Adams Calendar)": 31.33,
+    "107.1°E (Gunung Padang)": 107.1,
+    "168°W (Bering Strait)": -168.0,
+}
+DEFAULT_WIDTH_KM = 100.0
+
+
+def _wrap(lon):
+    return (np.asarray(lon, dtype=np.float64) + 180.0) % 360.0 - 180.0
+
+
+class CorridorIndex:
+
+    def __init__(self, data: pd.DataFrame, lat_col: str = "Latitude", lon_col: str = "Longitude"):
+        self.data = data
+        self.lat = data[lat_col].to_numpy(dtype=np.float64)
+        self.lon = _wrap(data[lon_col].to_numpy(dtype=np.float64))
+        self.xyz = to_unit_vectors(self.lat, self.lon)
+        self.by_lon = np.argsort(self.lon, kind="stable")
+        self.lon_sorted = self.lon[self.by_lon]
+        self.by_lat = np.argsort(self.lat, kind="stable")
+        self.lat_sorted = self.lat[self.by_lat]
+
+    def __len__(self) -> int:
+        return self.lat.size
+
+    # --- Pruning ---------------------------------------------------------------
+
+    def _lon_band(self, center: float, half_width: float) -> np.ndarray:
+        """Sites with longitude within half_width degrees of center (wrapping at ±180)."""
+        if half_width >= 180.0:
+            return self.by_lon
+        lo, hi = _wrap(center - half_width), _wrap(center + half_width)
+        search = self.lon_sorted.searchsorted
+        if lo <= hi:
+            return self.by_lon[search(lo, "left"):search(hi, "right")]
+        return np.concatenate((self.by_lon[search(lo, "left"):], self.by_lon[:search(hi, "right")]))
+
+    def _polar_caps(self, cutoff: float) -> np.ndarray:
+        """Sites with |latitude| > cutoff degrees."""
+        search = self.lat_sorted.searchsorted
+        return np.concatenate((self.by_lat[:search(-cutoff, "left")], self.by_lat[search(cutoff, "right"):]))
+
+    def _meridian_candidates(self, lon: float, width_rad: float, full_circle: bool) -> np.ndarray:
+        """
+        Superset of the sites within width of the meridian: below the cutoff
+        latitude c a site within width has |dlon| <= asin(sin(width) / cos c);
+        above it, everything is measured. cos c = sqrt(sin(width)) keeps both
+        the band and the caps narrow.
+        """
+        sin_w = np.sin(width_rad)
+        if sin_w >= 1.0 or len(self) == 0:
+            return np.arange(len(self))
+        cos_cut = np.sqrt(sin_w)
+        half_band = np.degrees(np.arcsin(sin_w / cos_cut))
+        parts = [self._lon_band(lon, half_band), self._polar_caps(np.degrees(np.arccos(cos_cut)))]
+        if full_circle:
+            parts.append(self._lon_band(lon + 180.0, half_band))
+        return np.unique(np.concatenate(parts))
+
+    # --- Queries ---------------------------------------------------------------
+
+    def _result(self, corridor: str, idx: np.ndarray, cross_rad: np.ndarray, along_rad=None) -> pd.DataFrame:
+        out = self.data.iloc[idx].copy()
+        out.insert(0, "Corridor", corridor)
+        out["Cross_km"] = cross_rad * EARTH_R_KM
+        out["Distance_km"] = np.abs(out["Cross_km"])
+        if along_rad is not None:
+            out["Along_km"] = along_rad * EARTH_R_KM
+        return out.sort_values("Distance_km", kind="stable")
+
+    def meridian(self, lon: float, width_km: float = DEFAULT_WIDTH_KM, full_circle: bool = False,
+                 name: str | None = None, prune: bool = True) -> pd.DataFrame:
+        """Sites within width_km of the meridian at lon, nearest first."""
+        width = width_km / EARTH_R_KM
+        idx = self._meridian_candidates(lon, width, full_circle) if prune else np.arange(len(self))
+        lat, dlon = np.radians(self.lat[idx]), np.radians(_wrap(self.lon[idx] - lon))
+        cross = np.arcsin(np.clip(np.cos(lat) * np.sin(dlon), -1.0, 1.0))
+        if not full_circle:
+            # beyond 90° of longitude the nearest point of the half circle is a pole
+            far = np.abs(dlon) > np.pi / 2
+            cross = np.where(far, np.sign(np.sin(dlon)) * (np.pi / 2 - np.abs(lat)), cross)
+        keep = np.abs(cross) <= width
+        return self._result(name or f"meridian {lon:g}", idx[keep], cross[keep])
+
+    def great_circle(self, pole, width_km: float = DEFAULT_WIDTH_KM, origin=None, name: str | None = None,
+                     prune: bool = True) -> pd.DataFrame:
+        """
+        Sites within width_km of the great circle with unit pole vector
+        `pole` (see geodesy.great_circle_pole / pole_from_azimuth), nearest
+        first. With origin (lat, lon) on the circle, Along_km is added.
+        """
+        pole = np.asarray(pole, dtype=np.float64)
+        if not np.all(np.isfinite(pole)):
+            raise ValueError("great circle is undefined (coincident or antipodal points)")
+        width = width_km / EARTH_R_KM
+        plane = self.xyz @ pole  # sin of the cross-track angle
+        idx = np.flatnonzero(np.abs(plane) <= np.sin(min(width, np.pi / 2))) if prune else np.arange(len(self))
+        cross = -np.arcsin(np.clip(plane[idx], -1.0, 1.0))
+        keep = np.abs(cross) <= width
+        idx, cross = idx[keep], cross[keep]
+        along = None
+        if origin is not None:
+            start = to_unit_vectors(*origin)
+            p = self.xyz[idx]
+            along = np.arctan2(p @ np.cross(pole, start), p @ start)
+        return self._result(name or "great circle", idx, cross, along)
+
+    def through(self, lat1: float, lon1: float, lat2: float, lon2: float, width_km: float = DEFAULT_WIDTH_KM,
+                name: str | None = None) -> pd.DataFrame:
+        """Sites within width_km of the great circle through two points (Along_km from the first)."""
+        return self.great_circle(great_circle_pole(lat1, lon1, lat2, lon2), width_km, (lat1, lon1),
+                                 name or f"gc {lat1:g},{lon1:g} -> {lat2:g},{lon2:g}")
+
+    def heading(self, lat: float, lon: float, azimuth: float, width_km: float = DEFAULT_WIDTH_KM,
+                name: str | None = None) -> pd.DataFrame:
+        """Sites within width_km of the great circle leaving (lat, lon) on azimuth."""
+        return self.great_circle(pole_from_azimuth(lat, lon, azimuth), width_km, (lat, lon),
+                                 name or f"gc {lat:g},{lon:g} az {azimuth:g}")
+
+
+def benchmark(n_sites: int = 200_000, width_km: float = DEFAULT_WIDTH_KM, repeats: int = 20,
+              seed: int = 0) -> dict:
+    """Pruned vs. full-scan corridor queries on random sites; results must be identical."""
+    rng = np.random.default_rng(seed)
+    sites = pd.DataFrame({"Latitude": np.degrees(np.arcsin(rng.uniform(-1, 1, n_sites))),
+                          "Longitude": rng.uniform(-180, 180, n_sites)})
+    t0 = time.perf_counter()
+    index = CorridorIndex(sites)
+    t_build = time.perf_counter() - t0
+    out = {"sites": n_sites, "build_s": t_build}
+    queries = {
+        "meridian": lambda prune: index.meridian(-72.66, width_km, prune=prune),
+        "great_circle": lambda prune: index.through(29.98, 31.13, -13.16, -72.55, width_km)
+        if prune else index.great_circle(great_circle_pole(29.98, 31.13, -13.16, -72.55), width_km,
+                                         (29.98, 31.13), prune=False),
+    }
+    for kind, run in queries.items():
+        timings = {}
+        for prune in (True, False):
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                result = run(prune)
+            timings[prune] = ((time.perf_counter() - t0) / repeats, result)
+        (t_fast, fast), (t_full, full) = timings[True], timings[False]
+        out[kind] = {"pruned_ms": t_fast * 1e3, "full_scan_ms": t_full * 1e3, "hits": len(fast),
+                     "identical": fast.index.equals(full.index)}
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Sites within a distance band of meridian / great-circle corridors.")
+    ap.add_argument("--catalog", nargs="+", default=list(MODELER_CATALOGS),
+                    help="CSV / Parquet path(s) and/or modeler dicts (default: all modeler dicts)")
+    ap.add_argument("--width-km", type=float, default=DEFAULT_WIDTH_KM, help="Half-width of the corridor band")
+    ap.add_argument("--meridian", type=float, action="append", default=[], help="Meridian longitude (repeatable)")
+    ap.add_argument("--great-circle", action="append", default=[], metavar="LAT1,LON1,LAT2,LON2",
+                    help="Great circle through two points (repeatable)")
+    ap.add_argument("--full-circle", action="store_true", help="Meridians include their antimeridian half")
+    ap.add_argument("--out", default=None, help="CSV of all matching sites")
+    ap.add_argument("--benchmark", type=int, default=0, metavar="N", help="Time pruned vs. full scans on N random sites")
+    args = ap.parse_args(argv)
+
+    if args.benchmark:
+        r = benchmark(args.benchmark, args.width_km)
+        print(f"🔍 {r['sites']:,} random sites, ±{args.width_km:g} km, index built in {r['build_s'] * 1e3:.1f} ms")
+        for kind in ("meridian", "great_circle"):
+            q = r[kind]
+            print(f"✅ {kind:13s}: pruned {q['pruned_ms']:7.2f} ms | full scan {q['full_scan_ms']:7.2f} ms "
+                  f"| {q['hits']:,} hits | identical: {q['identical']}")
+        return 0
+
+    try:
+        sites = pd.concat([load_catalog(src) for src in args.catalog], ignore_index=True)
+        circles = [tuple(float(v) for v in spec.split(",")) for spec in args.great_circle]
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    if any(len(c) != 4 for c in circles):
+        print("❌ Error: --great-circle takes LAT1,LON1,LAT2,LON2")
+        return 1
+    index = CorridorIndex(sites)
+    print(f"✅ {len(index):,} sites from {', '.join(args.catalog)}, corridor half-width {args.width_km:g} km")
+
+    meridians = {f"meridian {lon:g}": lon for lon in args.meridian}
+    if not meridians and not circles:
+        meridians = MODELER_CORRIDORS
+    named = [(name, index.meridian(lon, args.width_km, args.full_circle, name)) for name, lon in meridians.items()]
+    try:
+        for c in circles:
+            name = "great circle {:g},{:g} -> {:g},{:g}".format(*c)
+            named.append((name, index.through(*c, width_km=args.width_km, name=name)))
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    for name, r in named:
+        print(f"🔍 {name}: {len(r)} sites")
+        for _, row in r.head(5).iterrows():
+            print(f"     {row['Cross_km']:+9.1f} km  {row['Name']}")
+
+    if args.out:
+        pd.concat([r for _, r in named], ignore_index=True).to_csv(args.out, index=False)
+        print(f"✅ Corridor sites saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
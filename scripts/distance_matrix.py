@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+All-Pairs Distance & Bearing Matrices for Codex Node Catalogs
+Full symmetric distance matrix and initial-bearing matrix for any node
+table, plus the k nearest neighbors of every node.
+
+The n x n matrices are filled in square tiles of --block nodes. Only the
+tiles on and above the diagonal are solved: one tile gives the distances
+and forward azimuths i -> j and, through the back azimuths, the bearings
+j -> i. Tiles are computed in float64 (geodesy.inverse on WGS84, or the
+mean sphere with --sphere) and stored as float32 in memory-mapped .npy
+files, so catalogs far larger than RAM can be written and later opened
+with np.load(..., mmap_mode="r").
+
+Top-k neighbors are merged tile by tile during the same sweep (a running
+k-best per node), so they never need the full matrix in memory; with
+--no-matrix the matrices are not written at all.
+
+Inputs
+------
+- any CSV or Parquet file with Latitude/Longitude columns (e.g.
+  data/V3_Geodetic_Codex_Node_Table.csv; rows without coordinates are skipped)
+- or the nodes / geomagnetics / pyramids / forts dicts of
+  scripts/geodetic-codex-site-modeler.py, read without running the script
+
+Outputs (in --out-dir, prefixed with --name)
+-------
+- <name>_nodes.csv         : node order of the matrix rows/columns
+- <name>_distance_km.npy   : float32 (n, n) distances in km
+- <name>_bearing_deg.npy   : float32 (n, n) initial bearing row -> column (NaN on the diagonal)
+- <name>_top<k>.csv        : k nearest neighbors of every node (with --top-k)
+
+CLI
+---
+python scripts/distance_matrix.py --catalog data/V3_Geodetic_Codex_Node_Table.csv --top-k 3
+python scripts/distance_matrix.py --catalog forts pyramids nodes --name codex --block 2048 --top-k 5
+"""
+
+from __future__ import annotations
+import os, ast, argparse
+import numpy as np
+import pandas as pd
+
+from geodesy import haversine_km, initial_bearing, inverse
+
+MODELER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geodetic-codex-site-modeler.py")
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+MODELER_CATALOGS = ("nodes", "geomagnetics", "pyramids", "forts")
+NAME_COLUMNS = ("Label", "Name", "Node", "NodeID", "Site")
+DEFAULT_BLOCK = 1024
+
+
+def load_modeler_catalog(name: str, path: str = MODELER_PATH) -> pd.DataFrame:
+    """One of the {label: (lon, lat)} dicts of the site modeler, as a node table."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            entries = ast.literal_eval(node.value)
+            return pd.DataFrame({
+                "Name": [label.strip() for label in entries],
+                "Latitude": [float(v[1]) for v in entries.values()],
+                "Longitude": [float(v[0]) for v in entries.values()],
+                "Catalog": name,
+            })
+    raise ValueError(f"no {name} dict found in {path}")
+
+
+def load_catalog(source: str) -> pd.DataFrame:
+    """Node table from a CSV / Parquet path or a modeler dict name; keeps rows with coordinates."""
+    if source in MODELER_CATALOGS:
+        table = load_modeler_catalog(source)
+    else:
+        parquet = source.lower().endswith((".parquet", ".pq"))
+        table = pd.read_parquet(source) if parquet else pd.read_csv(source)
+        name_col = next((c for c in NAME_COLUMNS if c in table.columns), None)
+        if "Name" in table.columns:
+            table["Name"] = table["Name"].astype(str)
+        else:
+            table.insert(0, "Name", table[name_col].astype(str) if name_col else table.index.astype(str))
+        table["Catalog"] = os.path.splitext(os.path.basename(source))[0]
+    return table.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+
+
+def solve_tile(lat_a, lon_a, lat_b, lon_b, ellipsoidal: bool = True):
+    """(distance_km, bearing a->b, bearing b->a) for every pair of a tile, each (len(a), len(b))."""
+    lat_a, lon_a = lat_a[:, None], lon_a[:, None]
+    if ellipsoidal:
+        return inverse(lat_a, lon_a, lat_b, lon_b)
+    return (haversine_km(lat_a, lon_a, lat_b, lon_b), initial_bearing(lat_a, lon_a, lat_b, lon_b),
+            initial_bearing(lat_b, lon_b, lat_a, lon_a))
+
+
+def _merge_top_k(best_d, best_i, cand_d, cand_i, k):
+    """Keep the k smallest of (best, candidates) per row; rows stay sorted nearest first."""
+    d = np.concatenate([best_d, cand_d], axis=1)
+    i = np.concatenate([best_i, np.broadcast_to(cand_i, cand_d.shape)], axis=1)
+    if d.shape[1] > k:
+        part = np.argpartition(d, k - 1, axis=1)[:, :k]
+        d, i = np.take_along_axis(d, part, axis=1), np.take_along_axis(i, part, axis=1)
+    order = np.argsort(d, axis=1, kind="stable")
+    return np.take_along_axis(d, order, axis=1), np.take_along_axis(i, order, axis=1)
+
+
+def pair_matrices(lat, lon, *, block: int = DEFAULT_BLOCK, ellipsoidal: bool = True,
+                  distance_path: str | None = None, bearing_path: str | None = None,
+                  top_k: int = 0, verbose: bool = False):
+    """
+    Sweep the upper-triangle tiles of the all-pairs problem once. Writes the
+    float32 distance / bearing matrices to the given .npy paths (memory
+    mapped; skipped when None) and returns the top_k neighbors of every
+    node as (indices, distances_km), each (n, top_k), nearest first
+    (None when top_k is 0).
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = lat.size
+    if block <= 0:
+        raise ValueError("block must be positive")
+    top_k = min(top_k, n - 1)
+
+    open_npy = np.lib.format.open_memmap
+    dist_mm = open_npy(distance_path, mode="w+", dtype=np.float32, shape=(n, n)) if distance_path else None
+    bear_mm = open_npy(bearing_path, mode="w+", dtype=np.float32, shape=(n, n)) if bearing_path else None
+    if top_k > 0:
+        best_d = np.full((n, top_k), np.inf)
+        best_i = np.full((n, top_k), -1, dtype=np.int64)
+
+    starts = range(0, n, block)
+    for t, i0 in enumerate(starts):
+        i1 = min(i0 + block, n)
+        for j0 in range(i0, n, block):
+            j1 = min(j0 + block, n)
+            d, fwd, back = solve_tile(lat[i0:i1], lon[i0:i1], lat[j0:j1], lon[j0:j1], ellipsoidal)
+            if i0 == j0:
+                np.fill_diagonal(d, 0.0)
+                np.fill_diagonal(fwd, np.nan)
+                np.fill_diagonal(back, np.nan)
+            if dist_mm is not None:
+                dist_mm[i0:i1, j0:j1] = d
+                dist_mm[j0:j1, i0:i1] = d.T
+            if bear_mm is not None:
+                bear_mm[i0:i1, j0:j1] = fwd
+                bear_mm[j0:j1, i0:i1] = back.T
+            if top_k > 0:
+                cand = d.copy()
+                if i0 == j0:
+                    np.fill_diagonal(cand, np.inf)
+                best_d[i0:i1], best_i[i0:i1] = _merge_top_k(best_d[i0:i1], best_i[i0:i1], cand,
+                                                            np.arange(j0, j1), top_k)
+                if j0 != i0:
+                    best_d[j0:j1], best_i[j0:j1] = _merge_top_k(best_d[j0:j1], best_i[j0:j1], cand.T,
+                                                                np.arange(i0, i1), top_k)
+        if verbose:
+            print(f"🔍 row block {t + 1}/{len(starts)} done")
+
+    for mm in (dist_mm, bear_mm):
+        if mm is not None:
+            mm.flush()
+    if top_k <= 0:
+        return None
+    return best_i, best_d
+
+
+def top_k_table(nodes: pd.DataFrame, idx: np.ndarray, dist: np.ndarray) -> pd.DataFrame:
+    """Long-format neighbor table: one row per (node, rank)."""
+    n, k = idx.shape
+    return pd.DataFrame({
+        "Name": np.repeat(nodes["Name"].to_numpy(), k),
+        "Rank": np.tile(np.arange(1, k + 1), n),
+        "Neighbor": nodes["Name"].to_numpy()[idx.ravel()],
+        "Distance_km": dist.ravel(),
+    })
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="All-pairs distance and bearing matrices for a node catalog.")
+    ap.add_argument("--catalog", nargs="+", required=True,
+                    help=f"CSV path(s) and/or modeler dicts: {', '.join(MODELER_CATALOGS)}")
+    ap.add_argument("--name", default=None, help="Output prefix (default: first catalog name)")
+    ap.add_argument("--out-dir", default=DEFAULT_DATA_DIR)
+    ap.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="Tile size in nodes; bounds memory")
+    ap.add_argument("--sphere", action="store_true", help="Mean-sphere haversine instead of WGS84")
+    ap.add_argument("--top-k", type=int, default=0, help="Also extract the k nearest neighbors of every node")
+    ap.add_argument("--no-matrix", action="store_true", help="Only extract top-k neighbors")
+    args = ap.parse_args(argv)
+
+    try:
+        nodes = pd.concat([load_catalog(src) for src in args.catalog], ignore_index=True)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    if len(nodes) < 2:
+        print(f"❌ Error: need at least two nodes with coordinates, found {len(nodes)}")
+        return 1
+
+    name = args.name or nodes["Catalog"].iloc[0]
+    out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = os.path.join(out_dir, name)
+    print(f"✅ {len(nodes):,} nodes from {', '.join(args.catalog)}")
+
+    nodes.to_csv(f"{prefix}_nodes.csv", index=False)
+    write = not args.no_matrix
+    result = pair_matrices(
+        nodes["Latitude"], nodes["Longitude"], block=args.block, ellipsoidal=not args.sphere,
+        distance_path=f"{prefix}_distance_km.npy" if write else None,
+        bearing_path=f"{prefix}_bearing_deg.npy" if write else None,
+        top_k=args.top_k, verbose=len(nodes) > 4 * args.block)
+    if write:
+        print(f"✅ Matrices saved to {prefix}_distance_km.npy and {prefix}_bearing_deg.npy")
+
+    if result is not None:
+        k = result[0].shape[1]  # top_k clamped to n - 1
+        table = top_k_table(nodes, *result)
+        table.to_csv(f"{prefix}_top{k}.csv", index=False)
+        print(f"✅ {k} nearest neighbors per node saved to {prefix}_top{k}.csv")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
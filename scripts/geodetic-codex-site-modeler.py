@@ -1,95 +1,73 @@
-import matplotlib.pyplot as plt
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geodetic Codex Site Modeler
+Orthographic globe views of the star forts, pyramids, observatory nodes
+and geomagnetic points with the meridian corridors, tropics, paleopole
+arcs and pole axes.
+
+The figures are described by data: VIEWS lists the views (central
+longitude / latitude, optional extent, dpi) and build_layers() the layers
+drawn on every view (a kind from LAYER_DRAWERS with its coordinates and
+matplotlib style). Layers are built once in the parent; each view is then
+rendered and saved by its own worker of a process pool, so the PNGs are
+written concurrently and another view is one more VIEWS entry.
+
+Point layers are projected once per view with one vectorized
+transform_points call and drawn as a single scatter (PathCollection) in
+projected coordinates; their labels are one PathCollection of text
+outlines, laid out once per layer when the layers are built. A layer of
+~450 forts is thus two artists instead of ~900 Line2D / Text artists,
+each reprojected by cartopy on its own at draw time. Points and labels on
+the far side of the globe are dropped. Lines (corridors, parallels, pole
+axes) stay cartopy plots, which cut them at the horizon. --benchmark
+times both ways of drawing the forts layer.
+
+The site dicts (nodes, geomagnetics, pyramids, forts) and pole_epochs are
+plain literals: distance_matrix.py and pole_alignment.py read them
+without running this script.
+
+Outputs (in --out-dir)
+-------
+- ChiRLabs_<view>.png               : one per view
+- ChiRLabs_codex_quadrants.zip      : all rendered views
+- --benchmark: per-artist vs. collection drawing of the forts layer on stdout
+
+CLI
+---
+python scripts/geodetic-codex-site-modeler.py --out-dir /kaggle/working --workers 4
+python scripts/geodetic-codex-site-modeler.py --views codex1 codex3 --dpi 100
+python scripts/geodetic-codex-site-modeler.py --benchmark 3 --dpi 100
+"""
+
+from __future__ import annotations
+import io, os, time, zipfile, argparse, warnings
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
-import os
-import shutil
-import zipfile
+from pyproj import Geod
 
-import warnings
 warnings.filterwarnings("ignore")
-   
-
-# Monte Carlo simulated sites (random scatter around the globe for demonstration)
-
-np.random.seed(42)
-
-monte_carlo_longitudes = np.random.uniform(-180, 180, 400)
-
-monte_carlo_latitudes = np.random.uniform(-60, 60, 400)
-
-
-
-# Initialize figure with orthographic (globe-like) projection
-
-# Quadrant 1
-fig = plt.figure(figsize=(12, 12))
-ax = plt.axes(projection=ccrs.Orthographic(central_longitude=-50, central_latitude=10))
-ax.set_global()
-ax.coastlines(resolution='110m')
-ax.add_feature(cfeature.LAND)
-ax.add_feature(cfeature.OCEAN)
-ax.add_feature(cfeature.BORDERS)
-ax.add_feature(cfeature.LAKES)
-ax.gridlines(draw_labels=True)
-
-
-# --- Quadrant 2 ---
-fig2 = plt.figure(figsize=(12, 12))
-ax2 = plt.axes(projection=ccrs.Orthographic(central_longitude=40, central_latitude=10))
-
-ax2.set_global()
-ax2.coastlines(resolution='110m')
-ax2.add_feature(cfeature.LAND)
-ax2.add_feature(cfeature.OCEAN)
-ax2.add_feature(cfeature.BORDERS)
-ax2.add_feature(cfeature.LAKES)
-ax2.gridlines(draw_labels=True)
-
-# --- Quadrant 3---
-fig3 = plt.figure(figsize=(12, 12))
-ax3 = plt.axes(projection=ccrs.Orthographic(central_longitude=130, central_latitude=10))
-
-ax3.set_global()
-ax3.coastlines(resolution='110m')
-ax3.add_feature(cfeature.LAND)
-ax3.add_feature(cfeature.OCEAN)
-ax3.add_feature(cfeature.BORDERS)
-ax3.add_feature(cfeature.LAKES)
-ax3.gridlines(draw_labels=True)
-
-# --- Quadrant 4 ---
-fig4 = plt.figure(figsize=(12, 12))
-ax4 = plt.axes(projection=ccrs.Orthographic(central_longitude=220, central_latitude=10))
-
-ax4.set_global()
-ax4.coastlines(resolution='110m')
-ax4.add_feature(cfeature.LAND)
-ax4.add_feature(cfeature.OCEAN)
-ax4.add_feature(cfeature.BORDERS)
-ax4.add_feature(cfeature.LAKES)
-ax4.gridlines(draw_labels=True)
-
-
-# Monte Carlo simulated sites 
-
-ax.scatter(monte_carlo_longitudes, monte_carlo_latitudes, transform=ccrs.PlateCarree(),
-
-           color='gray', s=10, alpha=0.5, label='Monte Carlo Sites')
-
-ax2.scatter(monte_carlo_longitudes, monte_carlo_latitudes, transform=ccrs.PlateCarree(),
-
-           color='gray', s=10, alpha=0.5, label='Monte Carlo Sites')
-
-ax3.scatter(monte_carlo_longitudes, monte_carlo_latitudes, transform=ccrs.PlateCarree(),
-
-           color='gray', s=10, alpha=0.5, label='Monte Carlo Sites')
-
-
-ax4.scatter(monte_carlo_longitudes, monte_carlo_latitudes, transform=ccrs.PlateCarree(),
-
-           color='gray', s=10, alpha=0.5, label='Monte Carlo Sites')
 
+DEFAULT_OUT_DIR = "/kaggle/working"
+TITLE = ('Star Forts, Pyramids & Megalithic Observatories: The Geodetic Codex Framework\n'
+         'ChiRLabs | chir.app/codex.html | GitHub: dihedralg/HIA-Geodetic-Codex')
+PLATE = ccrs.PlateCarree()
+
+# Orthographic views; extent None = whole globe, else (lon0, lon1, lat0, lat1) in degrees
+VIEWS = [
+    {"name": "codex1", "central_longitude": -50, "central_latitude": 10, "extent": None, "dpi": 300},
+    {"name": "codex2", "central_longitude": 40, "central_latitude": 10, "extent": None, "dpi": 300},
+    {"name": "codex3", "central_longitude": 130, "central_latitude": 10, "extent": None, "dpi": 300},
+    {"name": "codex4", "central_longitude": 220, "central_latitude": 10, "extent": None, "dpi": 300},
+]
 
 
 # Updated nodes
@@ -586,267 +564,21 @@ forts = {
 }
 
 
-# Quadrant 1
-
-
-# Plot pyramids – yellow triangles 
-for label, (lon, lat) in pyramids.items():
-    ax.plot(lon, lat, marker='^', markersize=14, color='yellow', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-# Plot star forts – green stars with numbered labels (no names shown)
-for i, (label, (lon, lat)) in enumerate(forts.items(), 1):
-    ax.plot(lon, lat, marker='*', markersize=8, color='green', transform=ccrs.PlateCarree())
-    ax.text(lon + 1, lat + 1, f'cG-SF{i}', transform=ccrs.PlateCarree(), fontsize=6, color='gray')
-
-# Plot observatories – red circles
-for label, (lon, lat) in nodes.items():
-    ax.plot(lon, lat, marker='o', markersize=8, color='red', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-
-# Plot geomagnetics points – purple X's
-for label, (lon, lat) in geomagnetics.items():
-    ax.plot(lon, lat, marker='x', markersize=8, color='purple', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='purple')
-
-
-
-
-# 72.66°W corridor (MHO, CLO, CO, SO, MVO)
-
-ax.plot([-72.66, -72.66], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='72.66°W Corridor (MHO, CLO, CO, SO, MVO)')
-
-
-# 31.33°E corridor (Giza Plateau | Adam's Calendar)
-
-ax.plot([31.33, 31.33], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='31°E Corridor (Giza Plateau | Adams Calendar)')
-
-# 107°E corridor (Gunung Padang)
-
-ax.plot([107.1, 107.1], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='107°E Corridor (Gunung Padang)')
-
-# 168°W corridor (Bering Strait)
-
-ax.plot([-168.0, -168.0], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='168°W Corridor (Bering Strait)')
-
-
-
-
-
-# Quadrant 2
-
-
-# Plot pyramids – yellow triangles 
-for label, (lon, lat) in pyramids.items():
-    ax2.plot(lon, lat, marker='^', markersize=14, color='yellow', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-# Plot star forts – green stars with numbered labels (no names shown)
-for i, (label, (lon, lat)) in enumerate(forts.items(), 1):
-    ax2.plot(lon, lat, marker='*', markersize=8, color='green', transform=ccrs.PlateCarree())
-    ax2.text(lon + 1, lat + 1, f'cG-SF{i}', transform=ccrs.PlateCarree(), fontsize=6, color='gray')
-
-# Plot observatories – red circles
-for label, (lon, lat) in nodes.items():
-    ax2.plot(lon, lat, marker='o', markersize=8, color='red', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-
-# Plot geomagnetics points – purple X's
-for label, (lon, lat) in geomagnetics.items():
-    ax2.plot(lon, lat, marker='x', markersize=8, color='purple', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='purple')
-
-
-
-# 72.66°W corridor (MHO, CLO, CO, SO, MVO)
-
-ax2.plot([-72.66, -72.66], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='72.66°W Corridor (MHO, CLO, CO, SO, MVO)')
-
-
-# 31.33°E corridor (Giza Plateau | Adam's Calendar)
-
-ax2.plot([31.33, 31.33], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='31°E Corridor (Giza Plateau | Adams Calendar)')
-
-# 107°E corridor (Gunung Padang)
-
-ax2.plot([107.1, 107.1], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='107°E Corridor (Gunung Padang)')
-
-# 168°W corridor (Bering Strait)
-
-ax2.plot([-168.0, -168.0], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='168°W Corridor (Bering Strait)')
-
-
-
-# Quadrant 3 
-
-
-# Plot pyramids – yellow triangles 
-for label, (lon, lat) in pyramids.items():
-    ax3.plot(lon, lat, marker='^', markersize=14, color='yellow', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-# Plot star forts – green stars with numbered labels (no names shown)
-for i, (label, (lon, lat)) in enumerate(forts.items(), 1):
-    ax3.plot(lon, lat, marker='*', markersize=8, color='green', transform=ccrs.PlateCarree())
-    ax3.text(lon + 1, lat + 1, f'cG-SF{i}', transform=ccrs.PlateCarree(), fontsize=6, color='gray')
-
-# Plot observatories – red circles
-for label, (lon, lat) in nodes.items():
-    ax3.plot(lon, lat, marker='o', markersize=8, color='red', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-
-# Plot geomagnetics points – purple X's
-for label, (lon, lat) in geomagnetics.items():
-    ax3.plot(lon, lat, marker='x', markersize=8, color='purple', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='purple')
-
-
-# 72.66°W corridor (MHO, CLO, CO, SO, MVO)
-
-ax3.plot([-72.66, -72.66], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='72.66°W Corridor (MHO, CLO, CO, SO, MVO)')
-
-
-# 31.33°E corridor (Giza Plateau | Adam's Calendar)
-
-ax3.plot([31.33, 31.33], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='31°E Corridor (Giza Plateau | Adams Calendar)')
-
-# 107°E corridor (Gunung Padang)
-
-ax3.plot([107.1, 107.1], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='107°E Corridor (Gunung Padang)')
-
-# 168°W corridor (Bering Strait)
-
-ax3.plot([-168.0, -168.0], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='168°W Corridor (Bering Strait)')
-
-
-
-# Quadrant 4
-
-
-# Plot pyramids – yellow triangles 
-for label, (lon, lat) in pyramids.items():
-    ax4.plot(lon, lat, marker='^', markersize=14, color='yellow', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-# Plot star forts – green stars with numbered labels (no names shown)
-for i, (label, (lon, lat)) in enumerate(forts.items(), 1):
-    ax4.plot(lon, lat, marker='*', markersize=8, color='green', transform=ccrs.PlateCarree())
-    ax4.text(lon + 1, lat + 1, f'cG-SF{i}', transform=ccrs.PlateCarree(), fontsize=6, color='gray')
-
-# Plot observatories – red circles
-for label, (lon, lat) in nodes.items():
-    ax4.plot(lon, lat, marker='o', markersize=8, color='red', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='black')
-
-
-# Plot geomagnetics points – purple X's
-for label, (lon, lat) in geomagnetics.items():
-    ax4.plot(lon, lat, marker='x', markersize=8, color='purple', transform=ccrs.PlateCarree())
-    #ax.text(lon + 1, lat + 1, label, transform=ccrs.PlateCarree(), fontsize=7, color='purple')
-
-# 72.66°W corridor (MHO, CLO, CO, SO, MVO)
-
-ax4.plot([-72.66, -72.66], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='72.66°W Corridor (MHO, CLO, CO, SO, MVO)')
-
-
-# 31.33°E corridor (Giza Plateau | Adam's Calendar)
-
-ax4.plot([31.33, 31.33], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='31°E Corridor (Giza Plateau | Adams Calendar)')
-
-# 107°E corridor (Gunung Padang)
-
-ax4.plot([107.1, 107.1], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='107°E Corridor (Gunung Padang)')
-
-# 168°W corridor (Bering Strait)
-
-ax4.plot([-168.0, -168.0], [-90, 90], transform=ccrs.PlateCarree(), color='blue', linestyle='--', linewidth=2, label='168°W Corridor (Bering Strait)')
-
-
-
-
-
-
-
+# Meridian corridors: (longitude, legend label)
+corridors = [
+    (-72.66, '72.66°W Corridor (MHO, CLO, CO, SO, MVO)'),
+    (31.33, '31°E Corridor (Giza Plateau | Adams Calendar)'),
+    (107.1, '107°E Corridor (Gunung Padang)'),
+    (-168.0, '168°W Corridor (Bering Strait)'),
+]
 
 # Tropic lines & Equator
-
 tropic_lines = [23.4367, -23.4367]
 equator = [0]
 
-for lat in tropic_lines:
-
-    ax.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-             color='orange', linestyle='--', linewidth=2, label='Tropics')
-    
-    ax2.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-
-            color='orange', linestyle='--', linewidth=2, label='Tropics')
-    ax3.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-             color='orange', linestyle='--', linewidth=2, label='Tropics')
-    
-    ax4.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-
-            color='orange', linestyle='--', linewidth=2, label='Tropics')
-
-for lat in equator:
-
-    ax.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-            color='black', linestyle='--', linewidth=2, label='Equator')
-    ax2.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),        
-             color='black', linestyle='--', linewidth=2, label='Equator')
-    ax3.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),
-            color='black', linestyle='--', linewidth=2, label='Equator')
-    ax4.plot(np.linspace(-180, 180, 100), [lat]*100, transform=ccrs.PlateCarree(),        
-             color='black', linestyle='--', linewidth=2, label='Equator')
-
-# Paleopole arcs (approximate)
-
-arc_lats = [-80, -30, 0, 30, 80]
-
-for lat in arc_lats:
-
-    ax.plot(np.linspace(-180, 180, 200), [lat]*200, transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', alpha=0.5)
-    ax2.plot(np.linspace(-180, 180, 200), [lat]*200, transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', alpha=0.5)
-    ax3.plot(np.linspace(-180, 180, 200), [lat]*200, transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', alpha=0.5)
-    ax4.plot(np.linspace(-180, 180, 200), [lat]*200, transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', alpha=0.5)
-
 # Example Paleopole latitudes (these can be adjusted to your model)
 arc_lats = [-80, -30, 0, 30, 80]
 
-# Draw each arc as a latitude circle from -180° to +180°
-for lat in arc_lats:
-    longitudes = np.linspace(-180, 180, 360)  # finer line
-    latitudes = [lat] * len(longitudes)
-    ax.plot(longitudes, latitudes,
-            transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', linewidth=1, alpha=0.5)
-    
-    ax2.plot(longitudes, latitudes,
-            transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', linewidth=1, alpha=0.5)
-
-    ax3.plot(longitudes, latitudes,
-            transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', linewidth=1, alpha=0.5)
-
-    ax4.plot(longitudes, latitudes,
-            transform=ccrs.PlateCarree(),
-            color='green', linestyle=':', linewidth=1, alpha=0.5)
-
-
-import numpy as np
-from pyproj import Geod
-import warnings
-
-g = Geod(ellps="WGS84")
-
 # Robust: north-only VGPs — south pole is computed as true antipode
 pole_epochs = [
     {"epoch": "MIS 5e", "north": (-15.0, 85.0), "width": 1},
@@ -854,127 +586,273 @@ pole_epochs = [
     {"epoch": "Present", "north": (-72.66, 90.0), "width": 3}
 ]
 
-with warnings.catch_warnings():
-    warnings.simplefilter("ignore", category=RuntimeWarning)
-
-    for pair in pole_epochs:
-        lon1, lat1 = pair["north"]
-
-        # Compute antipode
-        lon2 = (lon1 + 180) % 360
-        if lon2 > 180:
-            lon2 -= 360
-        lat2 = -lat1
-
-        # Interpolate geodesic line
-        pts = g.npts(lon1, lat1, lon2, lat2, 100)
-        lons = [lon1] + [pt[0] for pt in pts] + [lon2]
-        lats = [lat1] + [pt[1] for pt in pts] + [lat2]
-
-        ax.plot(lons, lats,
-                transform=ccrs.PlateCarree(),
-                color='purple',
-                linestyle='-',
-                linewidth=pair["width"],
-                label=f"{pair['epoch']} pole axis")
-
-        ax2.plot(lons, lats,
-                 transform=ccrs.PlateCarree(),
-                 color='purple',
-                 linestyle='-',
-                 linewidth=pair["width"],
-                 label=f"{pair['epoch']} pole axis")
-
-        ax3.plot(lons, lats,
-                 transform=ccrs.PlateCarree(),
-                 color='purple',
-                 linestyle='-',
-                 linewidth=pair["width"],
-                 label=f"{pair['epoch']} pole axis")
-        ax4.plot(lons, lats,
-                 transform=ccrs.PlateCarree(),
-                 color='purple',
-                 linestyle='-',
-                 linewidth=pair["width"],
-                 label=f"{pair['epoch']} pole axis")
-
-
-# ---- Quadrant 1 ----
-fig.suptitle('Star Forts, Pyramids & Megalithic Observatories: The Geodetic Codex Framework\nChiRLabs | chir.app/codex.html | GitHub: dihedralg/HIA-Geodetic-Codex', fontsize=12)
-ax.legend(
-    loc='upper left',
-    bbox_to_anchor=(1.05, 1),
-    borderaxespad=0.,
-    fontsize='small'
-)
-fig.savefig('/kaggle/working/ChiRLabs_codex1.png', dpi=300, bbox_inches='tight')
-fig.show()
-
-# ---- Quadrant 2 ----
-fig2.suptitle('Star Forts, Pyramids & Megalithic Observatories: The Geodetic Codex Framework\nChiRLabs | chir.app/codex.html | GitHub: dihedralg/HIA-Geodetic-Codex', fontsize=12)
-ax2.legend(
-    loc='upper left',
-    bbox_to_anchor=(1.05, 1),
-    borderaxespad=0.,
-    fontsize='small'
-)
-fig2.savefig('/kaggle/working/ChiRLabs_codex2.png', dpi=300, bbox_inches='tight')
-fig2.show()
-
-# ---- Quadrant 3 ----
-fig3.suptitle('Star Forts, Pyramids & Megalithic Observatories: The Geodetic Codex Framework\nChiRLabs | chir.app/codex.html | GitHub: dihedralg/HIA-Geodetic-Codex', fontsize=12)
-ax3.legend(
-    loc='upper left',
-    bbox_to_anchor=(1.05, 1),
-    borderaxespad=0.,
-    fontsize='small'
-)
-fig3.savefig('/kaggle/working/ChiRLabs_codex3.png', dpi=300, bbox_inches='tight')
-fig3.show()
-
-# ---- Quadrant 4 ----
-fig4.suptitle('Star Forts, Pyramids & Megalithic Observatories: The Geodetic Codex Framework\nChiRLabs | chir.app/codex.html | GitHub: dihedralg/HIA-Geodetic-Codex', fontsize=12)
-ax4.legend(
-    loc='upper left',
-    bbox_to_anchor=(1.05, 1),
-    borderaxespad=0.,
-    fontsize='small'
-)
-fig4.savefig('/kaggle/working/ChiRLabs_codex4.png', dpi=300, bbox_inches='tight')
-
-
-
-
-
-# 1️⃣ Make sure your output folder exists
-output_dir = "/kaggle/working/frames"
-os.makedirs(output_dir, exist_ok=True)
-
-# 2️⃣ Define final image output filenames — always do this in the same cell you save them
-output_file1 = "/kaggle/working/ChiRLabs_codex1.png"
-output_file2 = "/kaggle/working/ChiRLabs_codex2.png"
-output_file3 = "/kaggle/working/ChiRLabs_codex3.png"
-output_file4 = "/kaggle/working/ChiRLabs_codex4.png"
-
-# 3️⃣ If your images were saved elsewhere, copy them into working (optional)
-# shutil.copy('path/to/local_q1.png', output_file1)
-
-# 4️⃣ Bundle them into a single zip — safest for Kaggle download
-zip_name = "/kaggle/working/ChiRLabs_codex_quadrants.zip"
-
-with zipfile.ZipFile(zip_name, 'w') as zipf:
-    zipf.write(output_file1, arcname='ChiRLabs_c_codex1.png')
-    zipf.write(output_file2, arcname='ChiRLabs_codex2.png')
-    zipf.write(output_file3, arcname='ChiRLabs_codex3.png')
-    zipf.write(output_file4, arcname='ChiRLabs_codex4.png')
-
-# 5️⃣ Optional: also copy spin frames folder (if needed)
-# shutil.copytree('frames', output_dir, dirs_exist_ok=True)
-
-# 6️⃣ Confirm final output for Kaggle Output tab:
-print(f"✅ All quadrants saved to:\n {output_file1}\n {output_file2}\n {output_file3}\n {output_file4}")
-print(f"✅ Quadrants ZIP saved to: {zip_name}")
-print(f"✅ Full spin frames saved to: {output_dir}")
-
-# 7️⃣ Final check: show what is in /kaggle/working
-print("🗂️ Current /kaggle/working content:", os.listdir("/kaggle/working"))
\ No newline at end of file
+
+# --- Layers ------------------------------------------------------------------
+
+def monte_carlo_sites(seed: int = 42, n: int = 400) -> tuple[np.ndarray, np.ndarray]:
+    """Monte Carlo simulated sites (random scatter around the globe for demonstration)."""
+    rng = np.random.RandomState(seed)
+    return rng.uniform(-180, 180, n), rng.uniform(-60, 60, n)
+
+
+def point_layer(lon, lat, style: dict, labels: list[str] | None = None, label_style: dict | None = None,
+                label_offset: tuple[float, float] = (1.0, 1.0), name: str | None = None) -> dict:
+    """
+    Points drawn as one scatter; style holds scatter keywords (marker, s,
+    color, alpha, label, ...), label_style the fontsize / color of the
+    per-point labels, placed label_offset degrees (lon, lat) from each point.
+    Label outlines are laid out here, once for every view. name identifies
+    the layer (e.g. "forts") to code that picks one out.
+    """
+    label_style = dict(label_style or {})
+    fontsize = label_style.pop("fontsize", None) or plt.rcParams["font.size"]
+    label_paths = [TextPath((0, 0), str(text), size=fontsize) for text in labels] if labels else None
+    return {"kind": "points", "name": name, "lon": np.asarray(lon, dtype=np.float64), "lat": np.asarray(lat, dtype=np.float64),
+            "style": style, "labels": labels, "label_paths": label_paths, "fontsize": fontsize,
+            "label_style": label_style, "label_offset": label_offset}
+
+
+def site_layer(sites: dict, marker: str, markersize: float, color: str, **kwargs) -> dict:
+    """Point layer of a {name: (lon, lat)} dict, styled like an ax.plot marker."""
+    lon, lat = np.array(list(sites.values()), dtype=np.float64).reshape(-1, 2).T
+    style = dict(marker=marker, s=markersize ** 2, color=color, linewidths=plt.rcParams["lines.markeredgewidth"])
+    return point_layer(lon, lat, style, **kwargs)
+
+
+def line_layer(lon, lat, **style) -> dict:
+    return {"kind": "line", "lon": np.asarray(lon, dtype=np.float64), "lat": np.asarray(lat, dtype=np.float64),
+            "style": style}
+
+
+def parallel_layer(lat: float, samples: int, **style) -> dict:
+    """Latitude circle from -180° to +180°."""
+    return line_layer(np.linspace(-180, 180, samples), np.full(samples, float(lat)), **style)
+
+
+def pole_axis_layers(epochs: list[dict] = pole_epochs, samples: int = 100) -> list[dict]:
+    """Geodesic from each north VGP to its antipode."""
+    g = Geod(ellps="WGS84")
+    layers = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for pair in epochs:
+            lon1, lat1 = pair["north"]
+            # antipode
+            lon2 = (lon1 + 180) % 360
+            if lon2 > 180:
+                lon2 -= 360
+            lat2 = -lat1
+            pts = g.npts(lon1, lat1, lon2, lat2, samples)
+            layers.append(line_layer([lon1] + [pt[0] for pt in pts] + [lon2],
+                                     [lat1] + [pt[1] for pt in pts] + [lat2],
+                                     color='purple', linestyle='-', linewidth=pair["width"],
+                                     label=f"{pair['epoch']} pole axis"))
+    return layers
+
+
+def build_layers() -> list[dict]:
+    """Every layer of the codex figures, in drawing (and legend) order."""
+    mc_lon, mc_lat = monte_carlo_sites()
+    layers = [
+        point_layer(mc_lon, mc_lat, dict(color='gray', s=10, alpha=0.5, label='Monte Carlo Sites'),
+                    name='monte_carlo'),
+        # pyramids – yellow triangles
+        site_layer(pyramids, '^', 14, 'yellow', name='pyramids'),
+        # star forts – green stars with numbered labels (no names shown)
+        site_layer(forts, '*', 8, 'green', labels=[f'cG-SF{i}' for i in range(1, len(forts) + 1)],
+                   label_style=dict(fontsize=6, color='gray'), name='forts'),
+        # observatories – red circles
+        site_layer(nodes, 'o', 8, 'red', name='nodes'),
+        # geomagnetics points – purple X's
+        site_layer(geomagnetics, 'x', 8, 'purple', name='geomagnetics'),
+    ]
+    layers += [line_layer([lon, lon], [-90, 90], color='blue', linestyle='--', linewidth=2, label=label)
+               for lon, label in corridors]
+    layers += [parallel_layer(lat, 100, color='orange', linestyle='--', linewidth=2, label='Tropics')
+               for lat in tropic_lines]
+    layers += [parallel_layer(lat, 100, color='black', linestyle='--', linewidth=2, label='Equator')
+               for lat in equator]
+    # Paleopole arcs (approximate), coarse and fine
+    layers += [parallel_layer(lat, 200, color='green', linestyle=':', alpha=0.5) for lat in arc_lats]
+    layers += [parallel_layer(lat, 360, color='green', linestyle=':', linewidth=1, alpha=0.5) for lat in arc_lats]
+    layers += pole_axis_layers()
+    return layers
+
+
+def project(ax, lon, lat) -> tuple[np.ndarray, np.ndarray]:
+    """Projected (x, y) of lon / lat arrays in one call, and the mask of points on the visible side."""
+    xy = ax.projection.transform_points(PLATE, np.asarray(lon), np.asarray(lat))[:, :2]
+    return xy, np.isfinite(xy).all(axis=1)
+
+
+def label_collection(ax, xy: np.ndarray, paths, color='black', **kwargs) -> PathCollection:
+    """
+    Labels as one PathCollection: each text outline (a TextPath in points,
+    baseline left at the anchor like ax.text) is offset to its projected xy.
+    """
+    labels = PathCollection(paths, offsets=xy, offset_transform=ax.transData, facecolors=color,
+                            edgecolors='none', zorder=3, clip_on=False, **kwargs)
+    labels.set_transform(Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans)
+    ax.add_collection(labels, autolim=False)
+    return labels
+
+
+def _draw_points_per_artist(ax, layer: dict) -> None:
+    """One ax.plot / ax.text per point, each reprojected by cartopy (--benchmark baseline)."""
+    style = dict(layer["style"])
+    style["markersize"] = np.sqrt(style.pop("s", plt.rcParams["lines.markersize"] ** 2))
+    style["markeredgewidth"] = style.pop("linewidths", None)
+    style.setdefault("marker", "o")
+    for lon, lat in zip(layer["lon"], layer["lat"]):
+        ax.plot(lon, lat, transform=PLATE, linestyle='none', **style)
+        style.pop("label", None)  # one legend entry per layer
+    if layer.get("labels"):
+        dx, dy = layer["label_offset"]
+        for lon, lat, text in zip(layer["lon"], layer["lat"], layer["labels"]):
+            ax.text(lon + dx, lat + dy, text, transform=PLATE, fontsize=layer["fontsize"], **layer["label_style"])
+
+
+def _draw_points(ax, layer: dict) -> None:
+    xy, visible = project(ax, layer["lon"], layer["lat"])
+    # zorder of the ax.plot markers, so lines drawn later still cover them
+    ax.scatter(xy[visible, 0], xy[visible, 1], transform=ax.transData, zorder=2, **layer["style"])
+    if layer.get("labels"):
+        dx, dy = layer["label_offset"]
+        xy, visible = project(ax, layer["lon"] + dx, layer["lat"] + dy)
+        label_collection(ax, xy[visible], [p for p, v in zip(layer["label_paths"], visible) if v],
+                         **layer["label_style"])
+
+
+def _draw_line(ax, layer: dict) -> None:
+    ax.plot(layer["lon"], layer["lat"], transform=PLATE, **layer["style"])
+
+
+LAYER_DRAWERS = {"points": _draw_points, "line": _draw_line}
+
+
+# --- Rendering ---------------------------------------------------------------
+
+BASE_FEATURES = (cfeature.LAND, cfeature.OCEAN, cfeature.BORDERS, cfeature.LAKES)
+
+# Layers and output directory of the current run, installed once per worker process.
+_RENDER = {}
+
+
+def _init_render(layers: list[dict], out_dir: str) -> None:
+    _RENDER.update(layers=layers, out_dir=out_dir)
+
+
+def view_axes(view: dict, base_map: bool = True):
+    """Figure and orthographic GeoAxes of a view, with coastlines, features and gridlines."""
+    fig = plt.figure(figsize=view.get("figsize", (12, 12)))
+    ax = plt.axes(projection=ccrs.Orthographic(central_longitude=view["central_longitude"],
+                                               central_latitude=view["central_latitude"]))
+    if view.get("extent") is None:
+        ax.set_global()
+    else:
+        ax.set_extent(view["extent"], crs=PLATE)
+    if base_map:
+        ax.coastlines(resolution='110m')
+        for feature in BASE_FEATURES:
+            ax.add_feature(feature)
+        ax.gridlines(draw_labels=True)
+    return fig, ax
+
+
+def render_view(view: dict) -> tuple[str, float]:
+    """Draw every layer on one view and save it; returns (path, seconds)."""
+    t0 = time.perf_counter()
+    fig, ax = view_axes(view)
+    for layer in _RENDER["layers"]:
+        LAYER_DRAWERS[layer["kind"]](ax, layer)
+
+    fig.suptitle(TITLE, fontsize=12)
+    ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1), borderaxespad=0., fontsize='small')
+    path = os.path.join(_RENDER["out_dir"], f"ChiRLabs_{view['name']}.png")
+    fig.savefig(path, dpi=view["dpi"], bbox_inches='tight')
+    plt.close(fig)
+    return path, time.perf_counter() - t0
+
+
+def render_views(views: list[dict], layers: list[dict], out_dir: str, workers: int | None = None) -> list[tuple[str, float]]:
+    """Render every view, one per worker process (in-process when workers is 1)."""
+    workers = max(1, min(len(views), workers or os.cpu_count() or 1))
+    if workers == 1:
+        _init_render(layers, out_dir)
+        return [render_view(view) for view in views]
+    # read the Natural Earth shapefiles once, so workers do not race to download them
+    for feature in BASE_FEATURES + (cfeature.COASTLINE,):
+        list(feature.geometries())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render, initargs=(layers, out_dir)) as pool:
+        return list(pool.map(render_view, views))
+
+
+def benchmark(repeats: int = 3, dpi: int = 100, view: dict = VIEWS[0]) -> dict:
+    """
+    Draw + save time of the forts layer (all forts with labels) on one view,
+    one artist per point vs. one collection per layer. The base map is left
+    out: it is the same for both. "empty" is the cost of the bare view.
+    """
+    layer = next(layer for layer in build_layers() if layer.get("name") == "forts")
+    out = {"forts": len(layer["lon"]), "dpi": dpi}
+    drawers = {"empty": lambda ax, layer: None, "per_artist": _draw_points_per_artist, "collection": _draw_points}
+    for name, draw in drawers.items():
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fig, ax = view_axes(view, base_map=False)
+            draw(ax, layer)
+            fig.savefig(io.BytesIO(), dpi=dpi, format="png")
+            times.append(time.perf_counter() - t0)
+            artists = len(ax.lines) + len(ax.texts) + len(ax.collections)
+            plt.close(fig)
+        out[name] = {"seconds": min(times), "artists": artists}
+    empty = out["empty"]["seconds"]
+    out["speedup"] = out["per_artist"]["seconds"] / out["collection"]["seconds"]
+    out["layer_speedup"] = (out["per_artist"]["seconds"] - empty) / max(out["collection"]["seconds"] - empty, 1e-9)
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Render the Geodetic Codex globe views.")
+    ap.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    ap.add_argument("--views", nargs="+", default=None, choices=[v["name"] for v in VIEWS],
+                    help="Views to render (default: all)")
+    ap.add_argument("--dpi", type=int, default=None, help="Override the dpi of every view")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes (one view each)")
+    ap.add_argument("--benchmark", type=int, default=0, metavar="REPEATS",
+                    help="Time per-artist vs. collection drawing of the forts layer")
+    args = ap.parse_args(argv)
+
+    if args.benchmark:
+        r = benchmark(args.benchmark, args.dpi or 100)
+        print(f"🔍 forts layer: {r['forts']} forts + labels, {VIEWS[0]['name']} view at {r['dpi']} dpi")
+        for name in ("empty", "per_artist", "collection"):
+            print(f"✅ {name:10s}: {r[name]['seconds']:.3f} s, {r[name]['artists']} artists")
+        print(f"✅ speed-up: {r['speedup']:.1f}x per figure, {r['layer_speedup']:.1f}x for the layer itself")
+        return 0
+
+    views = [dict(v) for v in VIEWS if args.views is None or v["name"] in args.views]
+    if args.dpi:
+        for view in views:
+            view["dpi"] = args.dpi
+    out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    layers = build_layers()
+    rendered = render_views(views, layers, out_dir, args.workers)
+    for path, seconds in rendered:
+        print(f"✅ {path} ({seconds:.1f} s)")
+    print(f"🔍 {len(rendered)} views, {len(layers)} layers in {time.perf_counter() - t0:.1f} s wall")
+
+    zip_name = os.path.join(out_dir, "ChiRLabs_codex_quadrants.zip")
+    with zipfile.ZipFile(zip_name, 'w') as zipf:
+        for path, _ in rendered:
+            zipf.write(path, arcname=os.path.basename(path))
+    print(f"✅ Views ZIP saved to: {zip_name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
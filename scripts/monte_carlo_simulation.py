@@ -1,117 +1,603 @@
-import os
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo Simulation of Site Alignments
+Randomized null model for the alignment count of the codex site list.
+
+Each trial draws one random site per real site from a null-model sampler
+(null_models.py: bounding box of the real sites by default, or
+area-uniform sphere, land mask, cluster-preserving) and counts the aligned
+random sites with one of the kernels in alignment_kernels.py:
+
+- paired-degrees (default) : original test, random site i within
+                           --threshold degrees (planar) of real site i
+- great-circle           : random site within --radius-km of great-circle
+                           distance of any real site (KD-tree on unit vectors)
+
+The CLI keeps paired-degrees as its default so existing invocations
+compute the same statistic; run_simulation() without a kernel uses
+great-circle.
+
+Trials are drawn in NumPy blocks of shape (trials x sites) so the distance
+and alignment counts for a whole block are one array operation. The block
+size bounds peak memory: roughly block_size * n_sites * 8 bytes per array.
+
+With --workers N the trials are sharded across a process pool. Each shard
+owns an independent stream spawned from one SeedSequence, and the per-shard
+alignment histograms are summed, so a run is bit-identical for a given
+seed, worker count and block size.
+
+Long runs can be checkpointed: the partial histogram and the bit-generator
+state of every shard are written to a small JSON file at a fixed wall-clock
+interval, and --resume continues from it with the same results as an
+uninterrupted run. Progress is reported as trials/s and ETA.
+
+With --target-ci-width the run is adaptive: after every round the
+Clopper-Pearson interval of the p-value P(count >= observed) is computed,
+and the run stops as soon as it is narrower than the target (after at
+least --min-trials). --num-simulations is then an upper bound and the
+trials saved are reported.
+
+With --thresholds the run is a threshold sweep: every trial's distances
+are computed once and counted against all thresholds in one pass
+(count_thresholds in alignment_kernels.py), giving a (thresholds x counts)
+histogram, a p-value per threshold and a threshold x statistic table.
+
+Inputs
+------
+- data/site_coordinates.csv : Latitude, Longitude (, Elevation)
+
+Outputs
+-------
+- data/mc_simulation_histogram.json : alignment-count histogram + run metadata
+                                     (seed, sampler, kernel, site set hash, ...)
+- per-trial CSV (optional, --csv)  : column Number_of_Alignments, expanded
+                                     from the histogram for legacy tools
+- data/mc_threshold_sweep.json + .csv (with --thresholds) : one histogram row
+                                     per threshold + threshold x statistic table
+- data/mc_checkpoint.json (with --checkpoint) : partial histogram + RNG state
+- Histogram plot (optional) and p-value of the observed alignment
+
+CLI
+---
+python scripts/monte_carlo_simulation.py \
+  --num-simulations 100000 --block-size 10000 --threshold 1.0 --seed 42 --workers 8 \
+  --checkpoint data/mc_checkpoint.json [--resume] [--csv data/mc_simulation_results.csv]
+python scripts/monte_carlo_simulation.py --kernel great-circle --radius-km 50 --seed 42
+python scripts/monte_carlo_simulation.py --thresholds 0.25 0.5 1 2 --seed 42
+"""
+
+from __future__ import annotations
+import os, json, time, hashlib, argparse
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
-print("Monte Carlo Simulation Running")
+try:
+    from scipy.stats import beta
+except ImportError:
+    beta = None
+
+from alignment_kernels import KERNELS, ONE_DEGREE_KM, GreatCircleKernel, PairedDegreeKernel, as_thresholds
+from null_models import (SAMPLERS, BoundingBoxSampler, ClusterPreservingSampler, LandMaskSampler,
+                         SphereUniformSampler)
+
+try:
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+DEFAULT_BLOCK_SIZE = 10_000
+HISTOGRAM_FORMAT = "hia-mc-histogram/1"
+
+
+def load_sites(path: str) -> pd.DataFrame:
+    """Read the site table and keep rows with valid coordinates."""
+    sites = pd.read_csv(path)
+    return sites.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+
+
+def simulate_block(rng: np.random.Generator, sampler, kernel, n_sites: int, n_trials: int,
+                   thresholds: np.ndarray | None = None) -> np.ndarray:
+    """
+    Run n_trials trials at once and return the alignment count of each: the
+    sampler draws (n_trials, n_sites) coordinate arrays, the kernel counts.
+    With thresholds the counts are (n_trials, thresholds), all from the
+    same random sites.
+    """
+    lat, lon = sampler.sample(rng, n_trials, n_sites)
+    if thresholds is None:
+        return kernel.count(lat, lon)
+    return kernel.count_thresholds(lat, lon, thresholds)
+
+
+def alignment_histogram(counts: np.ndarray, n_sites: int) -> np.ndarray:
+    """
+    Histogram of alignment counts: entry k is the number of trials with k
+    alignments. (trials, thresholds) counts give one histogram row per
+    threshold.
+    """
+    if counts.ndim == 1:
+        return np.bincount(counts, minlength=n_sites + 1).astype(np.int64)
+    n_thr = counts.shape[1]
+    offset = np.arange(n_thr) * (n_sites + 1)
+    hist = np.bincount((counts + offset).ravel(), minlength=n_thr * (n_sites + 1))
+    return hist.reshape(n_thr, n_sites + 1).astype(np.int64)
+
+
+def histogram_trials(hist: np.ndarray) -> int:
+    """Number of trials in a histogram (every threshold row holds all of them)."""
+    return int(np.atleast_2d(hist)[0].sum())
+
+
+def histogram_to_counts(hist: np.ndarray) -> np.ndarray:
+    """Expand a count histogram back into one alignment count per trial."""
+    return np.repeat(np.arange(hist.size), hist)
+
+
+# Sampler and kernel of the current run, installed once per worker process
+# (and in the parent for inline runs) instead of being pickled every round.
+_RUN = {}
+
+
+def _init_run(sampler, kernel, n_sites: int, thresholds: np.ndarray | None = None) -> None:
+    _RUN.update(sampler=sampler, kernel=kernel, n_sites=n_sites, thresholds=thresholds)
+
+
+def _simulate_shard(task: dict) -> tuple[np.ndarray, dict]:
+    """
+    Worker entry point: run one shard of trials and return its histogram
+    together with the final bit-generator state of the shard's stream.
+    """
+    rng = np.random.Generator(np.random.PCG64())
+    rng.bit_generator.state = task["state"]
+    n_sites, thresholds = _RUN["n_sites"], _RUN["thresholds"]
+    shape = (n_sites + 1,) if thresholds is None else (thresholds.size, n_sites + 1)
+    hist = np.zeros(shape, dtype=np.int64)
+    n_trials, block_size = task["n_trials"], task["block_size"]
+    for start in range(0, n_trials, block_size):
+        n = min(block_size, n_trials - start)
+        counts = simulate_block(rng, _RUN["sampler"], _RUN["kernel"], n_sites, n, thresholds)
+        hist += alignment_histogram(counts, n_sites)
+    return hist, rng.bit_generator.state
+
+
+def shard_sizes(num_simulations: int, n_shards: int) -> list[int]:
+    """Split the trials into n_shards near-equal shards (larger shards first)."""
+    base, extra = divmod(num_simulations, n_shards)
+    return [base + (i < extra) for i in range(n_shards)]
+
+
+def save_histogram(path: str, hist: np.ndarray, metadata: dict,
+                   statistic: str = "Number_of_Alignments") -> None:
+    """Write the count histogram and run metadata as a JSON sidecar."""
+    payload = {
+        "format": HISTOGRAM_FORMAT,
+        "statistic": statistic,
+        "counts": np.asarray(hist, dtype=np.int64).tolist(),
+        "metadata": metadata,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_histogram(path: str) -> tuple[np.ndarray, dict]:
+    """
+    Read an alignment-count histogram. Accepts the JSON sidecar written by
+    save_histogram or a legacy per-trial CSV (Number_of_Alignments column).
+    Threshold sweeps load as (thresholds, counts) arrays.
+    """
+    if path.endswith(".csv"):
+        counts = pd.read_csv(path)["Number_of_Alignments"].to_numpy(dtype=np.int64)
+        return np.bincount(counts).astype(np.int64), {"source": os.path.basename(path)}
+    with open(path) as f:
+        payload = json.load(f)
+    if payload.get("format") != HISTOGRAM_FORMAT:
+        raise ValueError(f"{path} is not a {HISTOGRAM_FORMAT} file")
+    return np.asarray(payload["counts"], dtype=np.int64), payload.get("metadata", {})
+
+
+def clopper_pearson(k: int, n: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Exact (Clopper-Pearson) confidence interval for a binomial proportion k/n."""
+    if beta is None:
+        raise ImportError("scipy is required for Clopper-Pearson intervals")
+    if n == 0:
+        return 0.0, 1.0
+    alpha = 1.0 - confidence
+    lo = beta.ppf(alpha / 2, k, n - k + 1) if k > 0 else 0.0
+    hi = beta.ppf(1 - alpha / 2, k + 1, n - k) if k < n else 1.0
+    return float(lo), float(hi)
+
+
+def site_set_hash(site_lat: np.ndarray, site_lon: np.ndarray) -> str:
+    """Stable fingerprint of the site coordinates used by a run."""
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(site_lat, dtype="<f8").tobytes())
+    h.update(np.ascontiguousarray(site_lon, dtype="<f8").tobytes())
+    return h.hexdigest()[:16]
+
 
-# Define paths
-repo_root = os.getcwd()  # Get working directory
-data_dir = os.path.join(repo_root, "HIA-Geodetic-Codex/data")
-output_path = os.path.join(data_dir, "mc_simulation_results.csv")
+class ProgressReporter:
+    """Prints throughput (trials/s) and ETA at most once per interval."""
 
-# Ensure data directory exists
-if not os.path.exists(data_dir):
-    os.makedirs(data_dir)
-    print(f"✅ Created directory: {data_dir}")
-else:
-    print(f"✅ Directory already exists: {data_dir}")
+    def __init__(self, total: int, done: int = 0, interval: float = 5.0, enabled: bool = True):
+        self.total = total
+        self.start_done = done
+        self.interval = interval
+        self.enabled = enabled
+        self.t0 = self.t_last = time.monotonic()
 
-# Load site coordinate data
-site_data_path = os.path.join(data_dir, "site_coordinates.csv")
-if not os.path.exists(site_data_path):
-    print(f"❌ Error: site_coordinates.csv not found at {site_data_path}")
-    exit()
+    def update(self, done: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not self.enabled or (not force and now - self.t_last < self.interval):
+            return
+        self.t_last = now
+        rate = (done - self.start_done) / max(now - self.t0, 1e-9)
+        eta = (self.total - done) / rate if rate > 0 else float("inf")
+        print(f"🔍 {done:,}/{self.total:,} trials ({100.0 * done / max(self.total, 1):.1f}%) | "
+              f"{rate:,.0f} trials/s | ETA {eta:,.0f} s")
 
-site_data = pd.read_csv(site_data_path)
 
-# Define Monte Carlo parameters
-num_simulations = 100000  # Make sure this is 10,000
-print(f"✅ Number of simulations set to: {num_simulations}")
+def save_checkpoint(path: str, state: dict) -> None:
+    """Write the checkpoint atomically so a crash never leaves a torn file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
 
-lat_min, lat_max = site_data["Latitude"].min(), site_data["Latitude"].max()
-lon_min, lon_max = site_data["Longitude"].min(), site_data["Longitude"].max()
 
-# Store results
-alignment_counts = []
+def load_checkpoint(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
 
-# Monte Carlo Simulation Loop
-for i in range(num_simulations):
-    random_sites = pd.DataFrame({
-        "Latitude": np.random.uniform(lat_min, lat_max, len(site_data)),
-        "Longitude": np.random.uniform(lon_min, lon_max, len(site_data))
+
+def run_simulation(sites: pd.DataFrame, num_simulations: int, *, sampler=None, kernel=None,
+                   thresholds=None, block_size: int = DEFAULT_BLOCK_SIZE, observed: int | None = None,
+                   target_ci_width: float | None = None, min_trials: int = 1000,
+                   confidence: float = 0.95,
+                   seed: int | None = None, workers: int = 1,
+                   checkpoint_path: str | None = None, resume: bool = False,
+                   checkpoint_interval: float = 60.0, progress_interval: float = 5.0,
+                   verbose: bool = True) -> tuple[np.ndarray, dict]:
+    """
+    Return the alignment-count histogram of num_simulations trials and the
+    run config (seed entropy, sampler and kernel parameters, site set
+    hash, ...). sampler defaults to the bounding box of the sites and
+    kernel to a GreatCircleKernel over them.
+
+    With thresholds (strictly increasing, in the kernel's units) every
+    trial is counted against all of them and the histogram has one row per
+    threshold.
+
+    The trials are split into `workers` shards, each with its own stream
+    spawned from SeedSequence(seed). Every round runs one block per shard,
+    in a process pool when workers > 1 and inline otherwise, and adds the
+    shard histograms in shard order. Between rounds the partial histogram
+    and shard states are checkpointed every checkpoint_interval seconds.
+
+    When target_ci_width is set, the run stops at the first round boundary
+    (after min_trials) where the Clopper-Pearson interval of
+    P(count >= observed) is narrower than target_ci_width (for every
+    threshold of a sweep); observed defaults to the number of sites.
+    """
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+
+    site_lat = sites["Latitude"].to_numpy(dtype="float64")
+    site_lon = sites["Longitude"].to_numpy(dtype="float64")
+    if sampler is None:
+        sampler = BoundingBoxSampler.around(site_lat, site_lon)
+    if kernel is None:
+        kernel = GreatCircleKernel(site_lat, site_lon)
+    if observed is None:
+        observed = site_lat.size
+    hist_shape = (site_lat.size + 1,)
+    config = {
+        "num_simulations": num_simulations,
+        "block_size": block_size,
+        **sampler.params(),
+        **kernel.params(),
+        "workers": workers,
+        "site_set_hash": site_set_hash(site_lat, site_lon),
+    }
+    if thresholds is not None:
+        thresholds = as_thresholds(thresholds)
+        hist_shape = (thresholds.size,) + hist_shape
+        config["thresholds"] = thresholds.tolist()
+    if target_ci_width is not None:
+        config.update(observed=observed, target_ci_width=target_ci_width,
+                      min_trials=min_trials, confidence=confidence)
+
+    def resolved() -> bool:
+        """Adaptive stopping rule: the p-value interval is narrow enough."""
+        n = histogram_trials(hist)
+        if target_ci_width is None or n < min_trials:
+            return False
+        for k in np.atleast_2d(hist)[:, observed:].sum(axis=1):
+            lo, hi = clopper_pearson(int(k), n, confidence)
+            if hi - lo >= target_ci_width:
+                return False
+        return True
+
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        ckpt = load_checkpoint(checkpoint_path)
+        saved = {k: ckpt["config"].get(k) for k in config}
+        if saved != config:
+            raise ValueError(f"Checkpoint {checkpoint_path} was written for a different run: {saved}")
+        if seed is not None and seed != ckpt["config"]["seed_entropy"]:
+            raise ValueError("--seed does not match the seed stored in the checkpoint")
+        config["seed_entropy"] = ckpt["config"]["seed_entropy"]
+        hist = np.asarray(ckpt["hist"], dtype=np.int64)
+        states = ckpt["states"]
+        remaining = ckpt["remaining"]
+        if verbose:
+            print(f"✅ Resuming from {checkpoint_path}: {histogram_trials(hist):,} trials done")
+    else:
+        seed_seq = np.random.SeedSequence(seed)
+        if verbose and seed is None:
+            print(f"✅ Seed entropy (pass as --seed to reproduce): {seed_seq.entropy}")
+        config["seed_entropy"] = seed_seq.entropy
+        hist = np.zeros(hist_shape, dtype=np.int64)
+        states = [np.random.PCG64(child).state for child in seed_seq.spawn(workers)]
+        remaining = shard_sizes(num_simulations, workers)
+
+    def checkpoint() -> None:
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, {
+                "config": config,
+                "hist": hist.tolist(),
+                "states": states,
+                "remaining": remaining,
+            })
+
+    progress = ProgressReporter(num_simulations, histogram_trials(hist), progress_interval, verbose)
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_run,
+                                   initargs=(sampler, kernel, site_lat.size, thresholds))
+        run_round = pool.map
+    else:
+        pool = None
+        _init_run(sampler, kernel, site_lat.size, thresholds)
+        run_round = map
+    t_checkpoint = time.monotonic()
+    try:
+        while any(remaining) and not resolved():
+            active = [i for i in range(workers) if remaining[i] > 0]
+            tasks = [
+                {
+                    "state": states[i],
+                    "n_trials": min(block_size, remaining[i]),
+                    "block_size": block_size,
+                }
+                for i in active
+            ]
+            for i, task, (shard_hist, state) in zip(active, tasks, run_round(_simulate_shard, tasks)):
+                hist += shard_hist
+                states[i] = state
+                remaining[i] -= task["n_trials"]
+
+            progress.update(histogram_trials(hist))
+            if time.monotonic() - t_checkpoint >= checkpoint_interval:
+                checkpoint()
+                t_checkpoint = time.monotonic()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    checkpoint()
+    progress.update(histogram_trials(hist), force=True)
+    if verbose and target_ci_width is not None and any(remaining):
+        print(f"✅ p-value resolved after {histogram_trials(hist):,} trials; "
+              f"{sum(remaining):,} of {num_simulations:,} trials saved")
+    return hist, config
+
+
+def plot_histogram(hist: np.ndarray, observed: int) -> None:
+    plt.bar(np.arange(hist.size), hist, width=1.0, color="blue", alpha=0.6, label="Monte Carlo Alignments")
+    plt.axvline(observed, color="red", linestyle="dashed", label="Observed Alignments")
+    plt.xlabel("Number of Alignments")
+    plt.ylabel("Frequency")
+    plt.title("Monte Carlo Simulation of Site Alignments")
+    plt.legend()
+    plt.show()
+
+
+def add_engine_arguments(ap: argparse.ArgumentParser, default_sampler: str = BoundingBoxSampler.name) -> None:
+    """CLI options shared by every script that drives run_simulation."""
+    ap.add_argument("--num-simulations", type=int, default=100000)
+    ap.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                    help="Trials per vectorized block; bounds peak memory")
+    ap.add_argument("--sampler", choices=sorted(SAMPLERS), default=default_sampler,
+                    help="Null model: bounding box (legacy), area-uniform sphere, land mask, cluster-preserving")
+    ap.add_argument("--land-mask", default=None, help="land sampler: .npy or GeoTIFF raster, row 0 = north")
+    ap.add_argument("--cluster-mode", choices=ClusterPreservingSampler.modes, default="rotate")
+    ap.add_argument("--jitter-km", type=float, default=0.0, help="cluster sampler: Gaussian jitter in km")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Process-pool size; results are reproducible per seed and worker count")
+    ap.add_argument("--target-ci-width", type=float, default=None,
+                    help="Adaptive mode: stop once the p-value confidence interval is narrower than this")
+    ap.add_argument("--min-trials", type=int, default=1000, help="Adaptive mode: minimum trials before stopping")
+    ap.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the p-value interval")
+    ap.add_argument("--checkpoint", default=None, help="Checkpoint JSON written during the run")
+    ap.add_argument("--checkpoint-interval", type=float, default=60.0, help="Seconds between checkpoints")
+    ap.add_argument("--resume", action="store_true", help="Continue from --checkpoint if it exists")
+    ap.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress reports")
+
+
+def build_sampler(args: argparse.Namespace, site_lat: np.ndarray, site_lon: np.ndarray):
+    if args.sampler == SphereUniformSampler.name:
+        return SphereUniformSampler()
+    if args.sampler == LandMaskSampler.name:
+        if not args.land_mask:
+            raise ValueError("--sampler land needs --land-mask")
+        return LandMaskSampler.from_file(args.land_mask)
+    if args.sampler == ClusterPreservingSampler.name:
+        if args.cluster_mode == "resample" and not args.jitter_km > 0:
+            raise ValueError("--cluster-mode resample needs --jitter-km > 0")
+        return ClusterPreservingSampler(site_lat, site_lon, args.cluster_mode, args.jitter_km)
+    return BoundingBoxSampler.around(site_lat, site_lon)
+
+
+def engine_options(args: argparse.Namespace) -> dict:
+    """run_simulation keyword arguments taken from add_engine_arguments options."""
+    return {
+        "block_size": args.block_size,
+        "target_ci_width": args.target_ci_width,
+        "min_trials": args.min_trials,
+        "confidence": args.confidence,
+        "seed": args.seed,
+        "workers": args.workers,
+        "checkpoint_path": args.checkpoint,
+        "resume": args.resume,
+        "checkpoint_interval": args.checkpoint_interval,
+        "progress_interval": args.progress_interval,
+    }
+
+
+def run_metadata(hist: np.ndarray, config: dict, n_sites: int, observed: int,
+                 num_simulations: int, confidence: float) -> dict:
+    """
+    Histogram sidecar metadata: run config plus the p-value and its
+    interval (lists with one entry per threshold for a sweep).
+    """
+    trials_run = histogram_trials(hist)
+    p_values, p_cis = [], []
+    for k in np.atleast_2d(hist)[:, observed:].sum(axis=1):
+        p_values.append(int(k) / trials_run)
+        p_cis.append(list(clopper_pearson(int(k), trials_run, confidence)) if beta else [None, None])
+    if hist.ndim == 1:
+        p_values, p_cis = p_values[0], p_cis[0]
+    return dict(config, n_sites=n_sites, observed=observed, trials_run=trials_run,
+                trials_saved=num_simulations - trials_run,
+                p_value=p_values, p_value_ci=p_cis,
+                created_utc=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+
+def sweep_table(hist: np.ndarray, thresholds, n_sites: int, observed: int,
+                confidence: float = 0.95) -> pd.DataFrame:
+    """Threshold x statistic table of a sweep histogram (one row per threshold)."""
+    values = np.arange(hist.shape[1], dtype=np.float64)
+    n = histogram_trials(hist)
+    mean = hist @ values / n
+    var = np.clip(hist @ values ** 2 / n - mean ** 2, 0.0, None)
+    k = hist[:, observed:].sum(axis=1)
+    ci = [clopper_pearson(int(x), n, confidence) if beta else (np.nan, np.nan) for x in k]
+    return pd.DataFrame({
+        "Threshold": np.asarray(thresholds, dtype=np.float64),
+        "Mean": mean,
+        "Standard Deviation": np.sqrt(var * n / (n - 1)) if n > 1 else np.nan,
+        "Mean Aligned Fraction": mean / n_sites,
+        "P(count >= 1)": hist[:, 1:].sum(axis=1) / n,
+        "p_value": k / n,
+        "p_value_ci_low": [lo for lo, _ in ci],
+        "p_value_ci_high": [hi for _, hi in ci],
     })
 
-    # Debugging: Print random sites sample
-    if i == 0:
-        print("🛠️ Random sites sample:")
-        print(random_sites.head())
-
-    # Calculate distances
-    distances = np.sqrt(
-        (site_data["Latitude"].values - random_sites["Latitude"].values) ** 2 +
-        (site_data["Longitude"].values - random_sites["Longitude"].values) ** 2
-    )
-
-    # Count alignments within 1-degree threshold
-    aligned_sites = np.sum(distances < 1.0)  # Adjust threshold if needed
-
-    # Debugging: Print distance sample and aligned count
-    if i % 1000 == 0:  # Print every 1,000 simulations
-        print(f"🔍 Simulation {i}: {aligned_sites} alignments found")
-
-    alignment_counts.append(aligned_sites)
-
-# Debugging: Print sample alignment counts
-print("🔍 Alignment counts sample:", alignment_counts[:10])
-
-# Ensure alignment_counts has data
-if not alignment_counts or sum(alignment_counts) == 0:
-    print("❌ Error: No alignments detected. Check input data.")
-    exit()
-
-# Convert results to DataFrame
-results_df = pd.DataFrame({"Number_of_Alignments": alignment_counts})
-
-# Debugging: Show DataFrame before saving
-print("🛠️ Monte Carlo results DataFrame preview:")
-print(results_df.head())
-
-# Check if DataFrame has data before saving
-if results_df.empty:
-    print("❌ Error: DataFrame is empty, nothing to save.")
-else:
-    results_df.to_csv(output_path, index=False)
-    print(f"✅ Monte Carlo simulation results saved to {output_path}")
-
-# Verify the file was created
-if os.path.exists(output_path):
-    print("✅ Monte Carlo simulation results successfully saved.")
-else:
-    print("❌ Error: File was not created.")
-
-# Pause for writing process
-import time
-time.sleep(2)
-
-# Verify the CSV file contains data
-df_check = pd.read_csv(output_path)
-if df_check.empty:
-    print("❌ Error: The saved CSV file is empty!")
-else:
-    print("✅ Saved CSV file contains data!")
-
-# Plot histogram
-plt.hist(alignment_counts, bins=50, color="blue", alpha=0.6, label="Monte Carlo Alignments")
-plt.axvline(len(site_data), color="red", linestyle="dashed", label="Observed Alignments")
-plt.xlabel("Number of Alignments")
-plt.ylabel("Frequency")
-plt.title("Monte Carlo Simulation of Site Alignments")
-plt.legend()
-plt.show()
-
-# Compute statistical significance
-p_value = np.sum(np.array(alignment_counts) >= len(site_data)) / num_simulations
-print(f"p-value of observed alignment: {p_value:.5f}")
-
-print("✅ Monte Carlo simulation completed successfully.")
\ No newline at end of file
+
+def format_p_value(metadata: dict, confidence: float) -> str:
+    p_lo, p_hi = metadata["p_value_ci"]
+    ci = f" ({confidence:.0%} CI {p_lo:.5f}-{p_hi:.5f})" if p_lo is not None else ""
+    return f"{metadata['p_value']:.5f}{ci} from {metadata['trials_run']:,} trials"
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Monte Carlo null model for site alignments.")
+    ap.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Directory holding site_coordinates.csv")
+    ap.add_argument("--sites", default=None, help="Site CSV (default: <data-dir>/site_coordinates.csv)")
+    ap.add_argument("--out", default=None,
+                    help="Histogram JSON (default: <data-dir>/mc_simulation_histogram.json)")
+    ap.add_argument("--csv", default=None, help="Also write the legacy one-row-per-trial CSV here")
+    add_engine_arguments(ap)
+    ap.add_argument("--kernel", choices=sorted(KERNELS), default=PairedDegreeKernel.name)
+    ap.add_argument("--radius-km", type=float, default=ONE_DEGREE_KM,
+                    help="great-circle kernel: alignment radius in km (default: 1 degree of arc)")
+    ap.add_argument("--threshold", type=float, default=1.0,
+                    help="paired-degrees kernel: alignment threshold in degrees")
+    ap.add_argument("--thresholds", type=float, nargs="+", default=None,
+                    help="Sweep these thresholds in one pass (degrees for paired-degrees, km for great-circle)")
+    ap.add_argument("--sweep-csv", default=None,
+                    help="Threshold x statistic table (default: <data-dir>/mc_threshold_sweep.csv)")
+    ap.add_argument("--no-plot", action="store_true", help="Skip the histogram plot")
+    args = ap.parse_args(argv)
+
+    print("Monte Carlo Simulation Running")
+
+    data_dir = os.path.abspath(args.data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    site_data_path = args.sites or os.path.join(data_dir, "site_coordinates.csv")
+    sweep = args.thresholds is not None
+    default_out = "mc_threshold_sweep.json" if sweep else "mc_simulation_histogram.json"
+    output_path = args.out or os.path.join(data_dir, default_out)
+    if sweep and args.csv:
+        print("❌ Error: --csv holds one count per trial and cannot store a threshold sweep")
+        return 1
+
+    if not os.path.exists(site_data_path):
+        print(f"❌ Error: site_coordinates.csv not found at {site_data_path}")
+        return 1
+
+    site_data = load_sites(site_data_path)
+    print(f"✅ Number of simulations set to: {args.num_simulations:,}")
+
+    site_lat = site_data["Latitude"].to_numpy(dtype="float64")
+    site_lon = site_data["Longitude"].to_numpy(dtype="float64")
+    try:
+        sampler = build_sampler(args, site_lat, site_lon)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    if args.kernel == PairedDegreeKernel.name:
+        kernel = PairedDegreeKernel(site_lat, site_lon, args.threshold)
+    else:
+        kernel = GreatCircleKernel(site_lat, site_lon, args.radius_km)
+
+    thresholds = sorted(set(args.thresholds)) if sweep else None
+    hist, config = run_simulation(site_data, args.num_simulations, sampler=sampler, kernel=kernel,
+                                  thresholds=thresholds, **engine_options(args))
+    if not sweep:
+        print("🔍 Alignment histogram:", {k: int(v) for k, v in enumerate(hist) if v})
+
+    if hist[..., 1:].sum() == 0:
+        print("❌ Error: No alignments detected. Check input data.")
+        return 1
+
+    # Compute statistical significance
+    observed = len(site_data)
+    metadata = run_metadata(hist, config, len(site_data), observed, args.num_simulations, args.confidence)
+    save_histogram(output_path, hist, metadata)
+    print(f"✅ Monte Carlo histogram saved to {output_path}")
+
+    if sweep:
+        table = sweep_table(hist, thresholds, len(site_data), observed, args.confidence)
+        table_path = args.sweep_csv or os.path.join(data_dir, "mc_threshold_sweep.csv")
+        table.to_csv(table_path, index=False)
+        print("🔍 Threshold sweep:")
+        print(table.to_string(index=False))
+        print(f"✅ Threshold x statistic table saved to {table_path}")
+        print("✅ Monte Carlo simulation completed successfully.")
+        return 0
+
+    if args.csv:
+        pd.DataFrame({"Number_of_Alignments": histogram_to_counts(hist)}).to_csv(args.csv, index=False)
+        print(f"✅ Per-trial results saved to {args.csv}")
+
+    if plt is not None and not args.no_plot:
+        plot_histogram(hist, observed)
+
+    print(f"p-value of observed alignment: {format_p_value(metadata, args.confidence)}")
+
+    print("✅ Monte Carlo simulation completed successfully.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nearest-site lookup for the codex site tables.
+
+SiteIndex is built once per table: the sites become 3D unit vectors in a
+KD-tree (chord metric, monotone in great-circle distance), so nearest,
+k-nearest and radius queries cost O(log n) instead of a geodesic call per
+row. The sphere only selects candidates; the final candidates are
+re-measured on the WGS84 ellipsoid in one vectorized geodesy.inverse call.
+Sphere and ellipsoid distances differ by well under REFINE_SLACK, so
+searching that much further on the sphere never misses the ellipsoidal
+answer.
+
+Query results are new DataFrames / Series with a Distance_km column; the
+table passed in is never modified. k_nearest_positions / within_positions
+answer the same queries as (positional indices, distances in km) without
+building any pandas object, and re-measure up to SCALAR_REFINE candidates
+with the scalar geodesy.inverse_km: that is the sub-millisecond path for
+services that format their own output.
+
+For many query points (raster cells, survey points) nearest_batch takes
+coordinate arrays -- NumPy, pandas or Arrow -- and returns the nearest
+site index and spherical distance of every point in one call. Points are
+processed in fixed-size chunks (bounded memory) on a thread pool; the
+KD-tree query releases the GIL, so chunks run in parallel.
+k_nearest_many / nearest_many / within_many answer many queries at once
+with the exact (ellipsoidal) results of the single-point methods.
+
+CLI
+---
+python scripts/nearest_site_lookup.py --points survey.csv --out survey_nearest.csv \
+  [--sites data/site_coordinates.csv] [--chunk-size 1000000] [--workers 8]
+"""
+
+from __future__ import annotations
+import os, argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
+
+from geodesy import chord_to_km, haversine_km, inverse, inverse_km, km_to_chord, to_unit_vectors
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+REFINE_SLACK = 0.01
+NEAREST_CANDIDATES = 8
+SCALAR_REFINE = 16  # candidates re-measured one by one rather than in one inverse() call
+DEFAULT_CHUNK_POINTS = 1 << 18
+BRUTE_FORCE_CELLS = 1 << 24
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+
+def as_coordinate_array(values) -> np.ndarray:
+    """float64 view of a NumPy/pandas/Arrow coordinate column (Arrow chunks are concatenated)."""
+    if hasattr(values, "to_numpy") and not isinstance(values, (np.ndarray, pd.Series, pd.Index)):
+        values = values.to_numpy(zero_copy_only=False)  # pyarrow Array / ChunkedArray
+    return np.ascontiguousarray(values, dtype=np.float64).ravel()
+
+
+class SiteIndex:
+
+    def __init__(self, data: pd.DataFrame, lat_col: str = "Latitude", lon_col: str = "Longitude",
+                 ellipsoidal: bool = True):
+        self.data = data
+        self.lat = data[lat_col].to_numpy(dtype=np.float64)
+        self.lon = data[lon_col].to_numpy(dtype=np.float64)
+        self.xyz = to_unit_vectors(self.lat, self.lon)
+        self.tree = cKDTree(self.xyz) if cKDTree is not None else None
+        self.ellipsoidal = ellipsoidal
+        self._row_labels = data.columns.append(pd.Index(["Distance_km"]))
+
+    def __len__(self) -> int:
+        return self.lat.size
+
+    def _k_nearest_km(self, lat: float, lon: float, k: int) -> np.ndarray:
+        """Spherical distances (km) of the k nearest sites, ascending."""
+        xyz = to_unit_vectors(lat, lon)
+        if self.tree is not None:
+            d, _ = self.tree.query(xyz, k=k)
+            return chord_to_km(np.atleast_1d(d))
+        return np.sort(chord_to_km(np.linalg.norm(self.xyz - xyz, axis=1)))[:k]
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Indices of all sites within radius_km on the sphere."""
+        xyz = to_unit_vectors(lat, lon)
+        chord = km_to_chord(radius_km)
+        if self.tree is not None:
+            return np.asarray(self.tree.query_ball_point(xyz, chord), dtype=np.intp)
+        return np.flatnonzero(np.linalg.norm(self.xyz - xyz, axis=1) <= chord)
+
+    def _nearest_chunk(self, lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest site index and chord distance for a chunk of query points."""
+        xyz = to_unit_vectors(lat, lon)
+        if self.tree is not None:
+            chord, idx = self.tree.query(xyz, k=1)
+            return idx, chord
+        # Brute force: the nearest site maximizes the dot product
+        idx = np.empty(len(xyz), dtype=np.intp)
+        step = max(1, BRUTE_FORCE_CELLS // max(len(self), 1))
+        for start in range(0, len(xyz), step):
+            idx[start:start + step] = np.argmax(xyz[start:start + step] @ self.xyz.T, axis=1)
+        return idx, np.linalg.norm(self.xyz[idx] - xyz, axis=1)
+
+    def nearest_batch(self, lat, lon, chunk_size: int = DEFAULT_CHUNK_POINTS,
+                      workers: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest site of every query point: (positional indices into the
+        table, great-circle distances in km on the mean sphere). lat/lon
+        are equal-length arrays (NumPy, pandas or Arrow); they are read
+        chunk_size points at a time by `workers` threads (default: CPUs).
+        """
+        lat, lon = as_coordinate_array(lat), as_coordinate_array(lon)
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same length")
+        if len(self) == 0:
+            raise ValueError("SiteIndex is empty")
+        idx = np.empty(lat.size, dtype=np.intp)
+        dist = np.empty(lat.size, dtype=np.float64)
+
+        def run(start: int) -> None:
+            stop = start + chunk_size
+            i, chord = self._nearest_chunk(lat[start:stop], lon[start:stop])
+            idx[start:stop] = i
+            dist[start:stop] = chord_to_km(chord)
+
+        starts = range(0, lat.size, chunk_size)
+        if workers == 1 or len(starts) <= 1:
+            for start in starts:
+                run(start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(run, starts))
+        return idx, dist
+
+    def k_nearest_many(self, lat, lon, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest sites of every query point, with the same answer as
+        k_nearest(): (positional indices, distances in km), each (points, k),
+        nearest first. The k + NEAREST_CANDIDATES spherical nearest sites of
+        all points are re-measured in one geodesy.inverse call; points whose
+        candidates do not cover the REFINE_SLACK band fall back to k_nearest().
+        """
+        lat, lon = as_coordinate_array(lat), as_coordinate_array(lon)
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same length")
+        k = min(k, len(self))
+        if k <= 0:
+            raise ValueError("SiteIndex is empty" if len(self) == 0 else "k must be positive")
+        n_cand = min(k + NEAREST_CANDIDATES, len(self)) if self.ellipsoidal else k
+        xyz = to_unit_vectors(lat, lon)
+        if self.tree is not None:
+            chord, cand = self.tree.query(xyz, k=n_cand)
+        else:
+            cand = np.argsort(-(xyz @ self.xyz.T), axis=1, kind="stable")[:, :n_cand]
+            chord = np.linalg.norm(self.xyz[cand] - xyz[:, None, :], axis=2)
+        chord, cand = chord.reshape(lat.size, n_cand), cand.reshape(lat.size, n_cand)
+        if not self.ellipsoidal:
+            return cand, haversine_km(lat[:, None], lon[:, None], self.lat[cand], self.lon[cand])
+        dist = inverse(lat[:, None], lon[:, None], self.lat[cand], self.lon[cand])[0]
+        order = np.lexsort((cand, dist), axis=1)[:, :k]
+        idx, dist = np.take_along_axis(cand, order, axis=1), np.take_along_axis(dist, order, axis=1)
+        sphere_km = chord_to_km(chord)
+        unsure = (n_cand < len(self)) & (sphere_km[:, -1] <= sphere_km[:, k - 1] * (1 + REFINE_SLACK) + 1e-9)
+        for p in np.flatnonzero(unsure):
+            i, d = self._refine(lat[p], lon[p], self._candidates(
+                lat[p], lon[p], sphere_km[p, k - 1] * (1 + REFINE_SLACK) + 1e-9))
+            idx[p], dist[p] = i[:k], d[:k]
+        return idx, dist
+
+    def nearest_many(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest site of every query point, as nearest(): (positional indices, distances in km)."""
+        idx, dist = self.k_nearest_many(lat, lon, 1)
+        return idx[:, 0], dist[:, 0]
+
+    def within_many(self, lat, lon, radius_km: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All sites within radius_km of every query point, as within(), in
+        flat form: (point positions, site indices, distances in km), grouped
+        by point and nearest first within each point.
+        """
+        lat, lon = as_coordinate_array(lat), as_coordinate_array(lon)
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same length")
+        search = km_to_chord(radius_km * (1 + REFINE_SLACK) if self.ellipsoidal else radius_km)
+        xyz = to_unit_vectors(lat, lon)
+        if self.tree is not None:
+            hits = self.tree.query_ball_point(xyz, search)
+        else:
+            hits = [np.flatnonzero(np.linalg.norm(self.xyz - p, axis=1) <= search) for p in xyz]
+        counts = np.fromiter((len(h) for h in hits), dtype=np.intp, count=lat.size)
+        point = np.repeat(np.arange(lat.size), counts)
+        idx = np.fromiter((i for h in hits for i in h), dtype=np.intp, count=counts.sum())
+        if self.ellipsoidal:
+            dist = inverse(lat[point], lon[point], self.lat[idx], self.lon[idx])[0]
+        else:
+            dist = haversine_km(lat[point], lon[point], self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        point, idx, dist = point[keep], idx[keep], dist[keep]
+        order = np.lexsort((idx, dist, point))
+        return point[order], idx[order], dist[order]
+
+    def distances_km(self, lat: float, lon: float, idx: np.ndarray) -> np.ndarray:
+        """Distances to the sites idx: WGS84 when ellipsoidal, else mean-sphere."""
+        if self.ellipsoidal:
+            if len(idx) <= SCALAR_REFINE:
+                return np.array([inverse_km(lat, lon, self.lat[i], self.lon[i]) for i in idx], dtype=np.float64)
+            return inverse(lat, lon, self.lat[idx], self.lon[idx])[0]
+        return haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+
+    def _result(self, idx: np.ndarray, dist: np.ndarray) -> pd.DataFrame:
+        out = self.data.iloc[idx].copy()
+        out["Distance_km"] = dist
+        return out
+
+    def _refine(self, lat: float, lon: float, idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        dist = self.distances_km(lat, lon, idx)
+        order = np.lexsort((idx, dist))  # co-located sites: lowest index first
+        return idx[order], dist[order]
+
+    def k_nearest_positions(self, lat: float, lon: float, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """The k nearest sites as (positional indices, distances in km), nearest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        if not self.ellipsoidal:
+            xyz = to_unit_vectors(lat, lon)
+            if self.tree is not None:
+                _, idx = self.tree.query(xyz, k=k)
+                idx = np.atleast_1d(idx)
+            else:
+                idx = np.argsort(np.linalg.norm(self.xyz - xyz, axis=1), kind="stable")[:k]
+            return idx, haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        kth_km = self._k_nearest_km(lat, lon, k)[-1]
+        idx, dist = self._refine(lat, lon, self._candidates(lat, lon, kth_km * (1 + REFINE_SLACK) + 1e-9))
+        return idx[:k], dist[:k]
+
+    def within_positions(self, lat: float, lon: float, radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+        """All sites within radius_km as (positional indices, distances in km), nearest first."""
+        if len(self) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        search_km = radius_km * (1 + REFINE_SLACK) if self.ellipsoidal else radius_km
+        idx, dist = self._refine(lat, lon, self._candidates(lat, lon, search_km))
+        keep = dist <= radius_km
+        return idx[keep], dist[keep]
+
+    def k_nearest(self, lat: float, lon: float, k: int = 5) -> pd.DataFrame:
+        """The k nearest sites, nearest first, with Distance_km."""
+        return self._result(*self.k_nearest_positions(lat, lon, k))
+
+    def nearest(self, lat: float, lon: float) -> pd.Series:
+        """The nearest site as a row (Series) with Distance_km; an empty Series if there are no sites."""
+        idx, dist = self.k_nearest_positions(lat, lon, 1)
+        if idx.size == 0:
+            return pd.Series(dtype=object)
+        row = self.data.iloc[idx[0]]
+        return pd.Series(np.append(row.to_numpy(), dist[0]), index=self._row_labels, name=row.name)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> pd.DataFrame:
+        """All sites within radius_km, nearest first, with Distance_km."""
+        return self._result(*self.within_positions(lat, lon, radius_km))
+
 
 def find_nearest_site(lat, lon, data):
-    user_coords = (lat, lon)
-    data['Distance_km'] = data.apply(lambda row: geodesic(user_coords, (row['Latitude'], row['Longitude'])).km, axis=1)
-    return data.sort_values('Distance_km').iloc[0]
+    """
+    Nearest row of data to (lat, lon) with its Distance_km. Builds a
+    throwaway SiteIndex; for repeated lookups build one SiteIndex and reuse it.
+    """
+    return SiteIndex(data).nearest(lat, lon)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Nearest codex site for every point of a CSV.")
+    ap.add_argument("--sites", default=os.path.join(DEFAULT_DATA_DIR, "site_coordinates.csv"))
+    ap.add_argument("--points", required=True, help="CSV of query points (Latitude, Longitude columns)")
+    ap.add_argument("--lat-col", default="Latitude")
+    ap.add_argument("--lon-col", default="Longitude")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--chunk-size", type=int, default=1_000_000, help="Query points read per chunk")
+    ap.add_argument("--workers", type=int, default=None, help="Query threads (default: CPUs)")
+    args = ap.parse_args(argv)
+
+    sites = pd.read_csv(args.sites).dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+    index = SiteIndex(sites, ellipsoidal=False)
+    print(f"✅ Indexed {len(index)} sites from {args.sites}")
+
+    n_points = 0
+    header = True
+    for chunk in pd.read_csv(args.points, usecols=[args.lat_col, args.lon_col], chunksize=args.chunk_size):
+        idx, dist = index.nearest_batch(chunk[args.lat_col], chunk[args.lon_col], workers=args.workers)
+        out = chunk.reset_index(drop=True)
+        out["Nearest_Site"] = idx
+        out["Distance_km"] = dist
+        out.to_csv(args.out, mode="w" if header else "a", header=header, index=False)
+        header = False
+        n_points += len(chunk)
+    print(f"✅ Nearest sites for {n_points:,} points saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
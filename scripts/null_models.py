@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Null-model samplers for the Monte Carlo engine.
+
+Every sampler draws a whole block of random site sets at once:
+
+    lat, lon = sampler.sample(rng, n_trials, n_sites)   # (n_trials, n_sites) degrees
+
+- BoundingBoxSampler     : legacy model, lat/lon uniform inside the bounding
+                           box of the real sites (oversamples high latitudes
+                           per unit area)
+- SphereUniformSampler   : area-uniform on the sphere, optionally limited to
+                           a latitude band (z = sin(lat) is uniform)
+- LandMaskSampler        : area-uniform over the cells of a land raster; the
+                           cumulative cell-area table is precomputed, so
+                           sampling is one searchsorted per point and never
+                           rejects a draw
+- ClusterPreservingSampler : moves the real site set as a whole, either by a
+                           random rigid rotation ("rotate", keeps every
+                           pairwise distance) or by resampling the real
+                           sites ("resample"), plus Gaussian jitter in km
+                           (optional for "rotate", required for "resample":
+                           unjittered resamples are the real sites and
+                           would align perfectly in every trial)
+
+Land masks are global lat/lon rasters with row 0 at the north edge, loaded
+from .npy (bool/weights) or GeoTIFF (needs rasterio); build_land_mask() can
+rasterize Natural Earth land with cartopy + shapely when they are installed.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+from geodesy import EARTH_R_KM, from_unit_vectors, to_unit_vectors
+
+try:
+    import rasterio
+except ImportError:
+    rasterio = None
+
+
+class BoundingBoxSampler:
+    name = "bbox"
+
+    def __init__(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float):
+        self.bounds = (float(lat_min), float(lat_max), float(lon_min), float(lon_max))
+
+    @classmethod
+    def around(cls, site_lat: np.ndarray, site_lon: np.ndarray) -> "BoundingBoxSampler":
+        return cls(np.min(site_lat), np.max(site_lat), np.min(site_lon), np.max(site_lon))
+
+    def params(self) -> dict:
+        return {"sampler": self.name, "bounds": list(self.bounds)}
+
+    def sample(self, rng: np.random.Generator, n_trials: int, n_sites: int):
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        lat = rng.uniform(lat_min, lat_max, (n_trials, n_sites))
+        lon = rng.uniform(lon_min, lon_max, (n_trials, n_sites))
+        return lat, lon
+
+
+class SphereUniformSampler:
+    name = "sphere"
+
+    def __init__(self, lat_min: float = -90.0, lat_max: float = 90.0):
+        self.lat_range = (float(lat_min), float(lat_max))
+
+    def params(self) -> dict:
+        return {"sampler": self.name, "lat_range": list(self.lat_range)}
+
+    def sample(self, rng: np.random.Generator, n_trials: int, n_sites: int):
+        z_lo, z_hi = np.sin(np.radians(self.lat_range))
+        lat = np.degrees(np.arcsin(rng.uniform(z_lo, z_hi, (n_trials, n_sites))))
+        lon = rng.uniform(-180.0, 180.0, (n_trials, n_sites))
+        return lat, lon
+
+
+class LandMaskSampler:
+    name = "land"
+
+    def __init__(self, mask: np.ndarray, source: str = ""):
+        weights = np.asarray(mask, dtype=np.float64)
+        if weights.ndim != 2:
+            raise ValueError("land mask must be a 2D lat/lon raster")
+        self.shape = weights.shape
+        self.source = source
+        n_rows, n_cols = self.shape
+
+        # Row i spans lat_edges[i] (north) .. lat_edges[i + 1] (south)
+        self.lat_edges = np.linspace(90.0, -90.0, n_rows + 1)
+        self.lon_edges = np.linspace(-180.0, 180.0, n_cols + 1)
+        z_edges = np.sin(np.radians(self.lat_edges))
+        cell_area = (z_edges[:-1] - z_edges[1:])[:, None]
+        cdf = np.cumsum((weights * cell_area).ravel())
+        if cdf[-1] <= 0:
+            raise ValueError("land mask has no positive cells")
+        self.cdf = cdf / cdf[-1]
+        self.z_edges = z_edges
+
+    @classmethod
+    def from_file(cls, path: str) -> "LandMaskSampler":
+        if path.endswith(".npy"):
+            return cls(np.load(path), source=path)
+        if rasterio is None:
+            raise ImportError("rasterio is required to read GeoTIFF land masks")
+        with rasterio.open(path) as ds:
+            return cls(ds.read(1) > 0, source=path)
+
+    def params(self) -> dict:
+        return {"sampler": self.name, "mask_shape": list(self.shape), "mask_source": self.source}
+
+    def sample(self, rng: np.random.Generator, n_trials: int, n_sites: int):
+        size = (n_trials, n_sites)
+        cell = np.searchsorted(self.cdf, rng.random(size), side="right")
+        cell = np.minimum(cell, self.cdf.size - 1)
+        row, col = np.divmod(cell, self.shape[1])
+        # Area-uniform inside the cell: z uniform between the row's edges
+        z = rng.uniform(self.z_edges[row + 1], self.z_edges[row])
+        lon = rng.uniform(self.lon_edges[col], self.lon_edges[col + 1])
+        return np.degrees(np.arcsin(z)), lon
+
+
+class ClusterPreservingSampler:
+    name = "cluster"
+    modes = ("rotate", "resample")
+
+    def __init__(self, site_lat: np.ndarray, site_lon: np.ndarray, mode: str = "rotate",
+                 jitter_km: float = 0.0):
+        if mode not in self.modes:
+            raise ValueError(f"mode must be one of {self.modes}")
+        if mode == "resample" and not jitter_km > 0:
+            raise ValueError("resample mode needs jitter_km > 0; unjittered resamples are the real sites")
+        self.site_xyz = to_unit_vectors(site_lat, site_lon)
+        self.mode = mode
+        self.jitter_km = float(jitter_km)
+
+    def params(self) -> dict:
+        return {"sampler": self.name, "mode": self.mode, "jitter_km": self.jitter_km}
+
+    def sample(self, rng: np.random.Generator, n_trials: int, n_sites: int):
+        if self.mode == "rotate":
+            xyz = np.einsum("tij,sj->tsi", random_rotations(rng, n_trials), self.site_xyz)
+        else:
+            xyz = self.site_xyz[rng.integers(0, len(self.site_xyz), (n_trials, n_sites))]
+        if self.jitter_km > 0:
+            # Isotropic Gaussian step in the local tangent plane
+            step = rng.normal(0.0, self.jitter_km / EARTH_R_KM, xyz.shape)
+            step -= np.sum(step * xyz, axis=-1, keepdims=True) * xyz
+            xyz = xyz + step
+        return from_unit_vectors(xyz)
+
+
+def random_rotations(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n uniformly distributed 3D rotation matrices (Shoemake's quaternion method)."""
+    u1, u2, u3 = rng.random((3, n))
+    a, b = np.sqrt(1.0 - u1), np.sqrt(u1)
+    w, x = a * np.sin(2 * np.pi * u2), a * np.cos(2 * np.pi * u2)
+    y, z = b * np.sin(2 * np.pi * u3), b * np.cos(2 * np.pi * u3)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=-1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=-1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=1)
+
+
+def build_land_mask(resolution_deg: float = 0.5) -> np.ndarray:
+    """
+    Rasterize Natural Earth land polygons (cartopy) onto a global grid of
+    cell centres; row 0 is the north edge. Save with np.save for reuse.
+    """
+    import cartopy.feature as cfeature
+    from shapely import contains_xy
+    from shapely.ops import unary_union
+
+    land = unary_union(list(cfeature.LAND.geometries()))
+    n_rows, n_cols = int(round(180 / resolution_deg)), int(round(360 / resolution_deg))
+    lat = 90.0 - (np.arange(n_rows) + 0.5) * resolution_deg
+    lon = -180.0 + (np.arange(n_cols) + 0.5) * resolution_deg
+    lon_g, lat_g = np.meshgrid(lon, lat)
+    return contains_xy(land, lon_g, lat_g)
+
+
+SAMPLERS = {
+    BoundingBoxSampler.name: BoundingBoxSampler,
+    SphereUniformSampler.name: SphereUniformSampler,
+    LandMaskSampler.name: LandMaskSampler,
+    ClusterPreservingSampler.name: ClusterPreservingSampler,
+}
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geometric Pattern Search over a Site Catalog
+Finds, over all sites at once:
+
+- pairs   : every pair whose distance matches a target length (e.g. the
+            V2 trihedral edge of ~3,965 mi) within a tolerance.
+- triples : every triple that is nearly great-circle-collinear -- the
+            middle site lies within a tolerance of the great circle
+            through the two sites of the longest side.
+
+Neither search enumerates all pairs / triples:
+
+- Pairs use the KD-tree of site unit vectors: partners of a site lie in
+  an annulus around it, i.e. inside a ball of the outer radius (or, for
+  targets beyond 90°, inside a ball around its antipode), which the tree
+  returns per block of sites; only those are measured, first on the
+  sphere with REFINE_SLACK and then on WGS84 (geodesy.inverse).
+- Triples are searched anchor by anchor. Seen from an anchor a, every
+  great circle through a is a line of constant bearing (mod 180°), so
+  the sites collinear with a and an end c are the sites whose bearing
+  from a is within a window of c's bearing. With the bearings sorted once
+  per anchor, each window is two searchsorted lookups; only the sites
+  inside are measured. A triple is reported once, from the lower-indexed
+  end of its longest side. Geometry is on the mean-radius sphere.
+
+Results are written to CSV block by block as they are found, so memory
+does not grow with the number of matches.
+
+Inputs
+------
+- --catalog: CSV / Parquet paths and/or modeler dicts (nodes, geomagnetics, pyramids, forts)
+
+Outputs (in --out-dir)
+-------
+- pattern_pairs.csv   : Site_A, Site_B, Distance_km, Distance_mi, Delta_mi
+- pattern_triples.csv : End_A, Middle, End_C, AB_km, BC_km, AC_km, Cross_km, Excess_km
+
+CLI
+---
+python scripts/pattern_search.py --catalog forts pyramids nodes geomagnetics --target-mi 3965 --tolerance-mi 10
+python scripts/pattern_search.py --catalog forts --triples --collinear-km 5 --min-separation-km 200
+python scripts/pattern_search.py --benchmark 300
+"""
+
+from __future__ import annotations
+import os, time, argparse
+import numpy as np
+import pandas as pd
+
+from distance_matrix import MODELER_CATALOGS, load_catalog
+from geodesy import EARTH_R_KM, KM_PER_MILE, haversine_km, initial_bearing, inverse, to_unit_vectors
+from nearest_site_lookup import REFINE_SLACK
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+V2_EDGE_MI = 3965.0
+DEFAULT_BLOCK = 256
+PAIR_COLUMNS = ["Site_A", "Site_B", "Distance_km", "Distance_mi", "Delta_mi"]
+TRIPLE_COLUMNS = ["End_A", "Middle", "End_C", "AB_km", "BC_km", "AC_km", "Cross_km", "Excess_km"]
+
+
+class PatternSearch:
+
+    def __init__(self, sites: pd.DataFrame, name_col: str = "Name"):
+        self.names = sites[name_col].astype(str).to_numpy()
+        self.lat = sites["Latitude"].to_numpy(dtype=np.float64)
+        self.lon = sites["Longitude"].to_numpy(dtype=np.float64)
+        self.xyz = to_unit_vectors(self.lat, self.lon)
+        self.tree = cKDTree(self.xyz) if cKDTree is not None else None
+
+    def __len__(self) -> int:
+        return self.lat.size
+
+    # --- Pairs -----------------------------------------------------------------
+
+    def _annulus_candidates(self, i0: int, i1: int, lo: float, hi: float) -> tuple[np.ndarray, np.ndarray]:
+        """(i, j) with i in [i0, i1), j > i and j possibly at an arc of lo..hi radians from i."""
+        xyz = self.xyz[i0:i1]
+        if self.tree is None:
+            hits = [np.arange(len(self))] * len(xyz)
+        elif hi <= np.pi / 2:
+            hits = self.tree.query_ball_point(xyz, 2.0 * np.sin(hi / 2))
+        elif lo >= np.pi / 2:
+            hits = self.tree.query_ball_point(-xyz, 2.0 * np.sin((np.pi - lo) / 2))
+        else:  # the annulus straddles 90°: the outer ball is most of the sphere
+            hits = self.tree.query_ball_point(xyz, 2.0 * np.sin(min(hi, np.pi) / 2))
+        counts = np.fromiter((len(h) for h in hits), dtype=np.intp, count=len(xyz))
+        i = np.repeat(np.arange(i0, i1), counts)
+        j = np.fromiter((k for h in hits for k in h), dtype=np.intp, count=counts.sum())
+        keep = j > i
+        return i[keep], j[keep]
+
+    def pairs(self, target_km: float, tolerance_km: float, ellipsoidal: bool = True, block: int = DEFAULT_BLOCK):
+        """Yield DataFrames of the pairs within tolerance_km of target_km, one per block of sites."""
+        slack = target_km * REFINE_SLACK if ellipsoidal else 0.0
+        lo = max(target_km - tolerance_km - slack, 0.0) / EARTH_R_KM
+        hi = (target_km + tolerance_km + slack) / EARTH_R_KM
+        for i0 in range(0, len(self), block):
+            i, j = self._annulus_candidates(i0, min(i0 + block, len(self)), lo, hi)
+            arc = np.arccos(np.clip(np.einsum("ij,ij->i", self.xyz[i], self.xyz[j]), -1.0, 1.0))
+            keep = (arc >= lo) & (arc <= hi)
+            i, j = i[keep], j[keep]
+            if ellipsoidal:
+                dist = inverse(self.lat[i], self.lon[i], self.lat[j], self.lon[j])[0]
+            else:
+                dist = haversine_km(self.lat[i], self.lon[i], self.lat[j], self.lon[j])
+            keep = np.abs(dist - target_km) <= tolerance_km
+            if keep.any():
+                i, j, dist = i[keep], j[keep], dist[keep]
+                yield pd.DataFrame({
+                    "Site_A": self.names[i], "Site_B": self.names[j],
+                    "Distance_km": dist, "Distance_mi": dist / KM_PER_MILE,
+                    "Delta_mi": (dist - target_km) / KM_PER_MILE,
+                })
+
+    # --- Collinear triples -----------------------------------------------------
+
+    def _anchor_triples(self, a: int, sin_tol: float, min_sep: float) -> tuple[np.ndarray, ...] | None:
+        """Triples whose longest side runs from anchor a to an end c > a: (b, c, ab, bc, ac, cross), radians."""
+        rho = np.arccos(np.clip(self.xyz @ self.xyz[a], -1.0, 1.0))
+        others = np.flatnonzero(rho >= min_sep)
+        ends = others[(others > a) & (rho[others] <= np.pi - min_sep)]
+        if others.size < 2 or ends.size == 0:
+            return None
+        # bearings mod 180°: b may lie on either arc of the circle through a and c
+        theta = np.radians(initial_bearing(self.lat[a], self.lon[a], self.lat, self.lon)) % np.pi
+        order = others[np.argsort(theta[others], kind="stable")]
+        ring = np.concatenate((theta[order] - np.pi, theta[order], theta[order] + np.pi))
+        ring_idx = np.tile(order, 3)
+
+        # cross-track of b from circle(a, c) = asin(sin(ab) sin(d_bearing)); ab is in [min_sep, ac]
+        sin_floor = np.minimum(np.sin(min_sep), np.sin(rho[ends]))
+        window = np.arcsin(np.minimum(1.0, sin_tol / sin_floor))
+        start = np.searchsorted(ring, theta[ends] - window, "left")
+        stop = np.searchsorted(ring, theta[ends] + window, "right")
+        counts = np.minimum(stop - start, order.size)  # a window of 180° holds every site once
+        c = np.repeat(ends, counts)
+        pos = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        b = ring_idx[pos]
+
+        ab, ac = rho[b], rho[c]
+        bc = np.arccos(np.clip(np.einsum("ij,ij->i", self.xyz[b], self.xyz[c]), -1.0, 1.0))
+        keep = (b != c) & (ab <= ac) & (bc <= ac) & (bc >= min_sep)
+        b, c, ab, bc, ac = b[keep], c[keep], ab[keep], bc[keep], ac[keep]
+        pole = np.cross(self.xyz[a], self.xyz[c])
+        pole /= np.linalg.norm(pole, axis=1, keepdims=True)
+        cross = np.arcsin(np.clip(np.einsum("ij,ij->i", self.xyz[b], pole), -1.0, 1.0))
+        keep = np.abs(cross) <= np.arcsin(sin_tol)
+        return b[keep], c[keep], ab[keep], bc[keep], ac[keep], cross[keep]
+
+    def collinear_triples(self, tolerance_km: float, min_separation_km: float = 100.0, block: int = DEFAULT_BLOCK):
+        """
+        Yield DataFrames of the nearly collinear triples (middle site within
+        tolerance_km of the great circle through the ends of the longest
+        side; all sides at least min_separation_km), one per block of anchors.
+        """
+        sin_tol = np.sin(min(tolerance_km / EARTH_R_KM, np.pi / 2))
+        min_sep = max(min_separation_km / EARTH_R_KM, 1e-9)
+        for a0 in range(0, len(self), block):
+            frames = []
+            for a in range(a0, min(a0 + block, len(self))):
+                found = self._anchor_triples(a, sin_tol, min_sep)
+                if found is None or found[0].size == 0:
+                    continue
+                b, c, ab, bc, ac, cross = found
+                frames.append(pd.DataFrame({
+                    "End_A": self.names[a], "Middle": self.names[b], "End_C": self.names[c],
+                    "AB_km": ab * EARTH_R_KM, "BC_km": bc * EARTH_R_KM, "AC_km": ac * EARTH_R_KM,
+                    "Cross_km": cross * EARTH_R_KM, "Excess_km": (ab + bc - ac) * EARTH_R_KM,
+                }))
+            if frames:
+                yield pd.concat(frames, ignore_index=True)
+
+
+def stream_csv(frames, path: str, columns: list[str]) -> int:
+    """Write DataFrames to one CSV under a `columns` header as they arrive; returns the number of rows."""
+    rows = 0
+    pd.DataFrame(columns=columns).to_csv(path, index=False)  # header only, even with no matches
+    for frame in frames:
+        frame[columns].to_csv(path, mode="a", header=False, index=False)
+        rows += len(frame)
+    return rows
+
+
+def benchmark(n_sites: int = 300, target_km: float = V2_EDGE_MI * KM_PER_MILE, tolerance_km: float = 50.0,
+              collinear_km: float = 50.0, min_separation_km: float = 300.0, seed: int = 0) -> dict:
+    """Time both searches on random sites and check them against brute-force enumeration."""
+    rng = np.random.default_rng(seed)
+    lat, lon = np.degrees(np.arcsin(rng.uniform(-1, 1, n_sites))), rng.uniform(-180, 180, n_sites)
+    search = PatternSearch(pd.DataFrame({"Name": np.arange(n_sites).astype(str), "Latitude": lat, "Longitude": lon}))
+    out = {"sites": n_sites}
+
+    t0 = time.perf_counter()
+    pairs = pd.concat([pd.DataFrame(columns=["Site_A", "Site_B"])] + list(search.pairs(target_km, tolerance_km)))
+    out["pairs_s"] = time.perf_counter() - t0
+    i, j = np.triu_indices(n_sites, 1)
+    dist = inverse(lat[i], lon[i], lat[j], lon[j])[0]
+    hit = np.abs(dist - target_km) <= tolerance_km
+    found = set(zip(pairs["Site_A"].astype(int), pairs["Site_B"].astype(int)))
+    out["pairs"] = len(found)
+    out["pairs_match"] = found == set(zip(i[hit], j[hit]))
+
+    t0 = time.perf_counter()
+    triples = pd.concat([pd.DataFrame(columns=["End_A", "Middle", "End_C"])]
+                        + list(search.collinear_triples(collinear_km, min_separation_km)))
+    out["triples_s"] = time.perf_counter() - t0
+    xyz, sep = search.xyz, min_separation_km / EARTH_R_KM
+    arc = np.arccos(np.clip(xyz @ xyz.T, -1.0, 1.0))
+    t0 = time.perf_counter()
+    expected = set()
+    for a, c in zip(i, j):  # every pair as the longest side, every third site as the middle
+        if not sep <= arc[a, c] <= np.pi - sep:
+            continue
+        pole = np.cross(xyz[a], xyz[c])
+        cross = np.abs(np.arcsin(np.clip(xyz @ (pole / np.linalg.norm(pole)), -1.0, 1.0)))
+        side = np.minimum(arc[a], arc[c])
+        longest = np.maximum(arc[a], arc[c]) <= arc[a, c]
+        for b in np.flatnonzero(longest & (side >= sep) & (cross <= np.arcsin(np.sin(collinear_km / EARTH_R_KM)))):
+            expected.add(frozenset((a, b, c)))
+    out["brute_force_s"] = time.perf_counter() - t0
+    found = {frozenset(map(int, t)) for t in triples[["End_A", "Middle", "End_C"]].to_numpy()}
+    out["triples"] = len(triples)
+    out["triples_match"] = len(found) == len(triples) and found == expected
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Target-length pairs and collinear triples over a site catalog.")
+    ap.add_argument("--catalog", nargs="+", default=list(MODELER_CATALOGS),
+                    help="CSV / Parquet path(s) and/or modeler dicts (default: all modeler dicts)")
+    ap.add_argument("--pairs", action="store_true", help="Only the target-length pair search")
+    ap.add_argument("--triples", action="store_true", help="Only the collinear-triple search")
+    ap.add_argument("--target-mi", type=float, default=V2_EDGE_MI, help="Target pair length in miles")
+    ap.add_argument("--tolerance-mi", type=float, default=10.0, help="Pair length tolerance in miles")
+    ap.add_argument("--sphere", action="store_true", help="Pair lengths on the mean sphere instead of WGS84")
+    ap.add_argument("--collinear-km", type=float, default=10.0,
+                    help="Maximum distance of the middle site from the great circle")
+    ap.add_argument("--min-separation-km", type=float, default=100.0, help="Minimum side length of a triple")
+    ap.add_argument("--out-dir", default=DEFAULT_DATA_DIR)
+    ap.add_argument("--benchmark", type=int, default=0, metavar="N",
+                    help="Time both searches on N random sites against brute force")
+    args = ap.parse_args(argv)
+
+    if args.benchmark:
+        r = benchmark(args.benchmark)
+        print(f"🔍 {r['sites']:,} random sites")
+        print(f"✅ pairs  : {r['pairs']:,} in {r['pairs_s']:.2f} s | identical to brute force: {r['pairs_match']}")
+        print(f"✅ triples: {r['triples']:,} in {r['triples_s']:.2f} s (brute force {r['brute_force_s']:.2f} s) "
+              f"| identical: {r['triples_match']}")
+        return 0
+    run_pairs = args.pairs or not args.triples
+    run_triples = args.triples or not args.pairs
+
+    try:
+        sites = pd.concat([load_catalog(src) for src in args.catalog], ignore_index=True)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    search = PatternSearch(sites)
+    out_dir = os.path.abspath(args.out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"✅ {len(search):,} sites from {', '.join(args.catalog)}")
+
+    if run_pairs:
+        path = os.path.join(out_dir, "pattern_pairs.csv")
+        t0 = time.perf_counter()
+        n = stream_csv(search.pairs(args.target_mi * KM_PER_MILE, args.tolerance_mi * KM_PER_MILE,
+                                    ellipsoidal=not args.sphere), path, PAIR_COLUMNS)
+        print(f"🔍 {n:,} pairs at {args.target_mi:g} ± {args.tolerance_mi:g} mi "
+              f"({time.perf_counter() - t0:.2f} s) -> {path}")
+    if run_triples:
+        path = os.path.join(out_dir, "pattern_triples.csv")
+        t0 = time.perf_counter()
+        n = stream_csv(search.collinear_triples(args.collinear_km, args.min_separation_km), path, TRIPLE_COLUMNS)
+        print(f"🔍 {n:,} collinear triples within {args.collinear_km:g} km "
+              f"({time.perf_counter() - t0:.2f} s) -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
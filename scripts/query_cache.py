@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LRU / TTL cache for HarmonicAPI query results.
+
+Entries are keyed on (catalog version, query kind, query arguments with
+coordinates rounded to `decimals` places). The version part means a
+result computed from one catalog is never served for another: when the
+catalog changes the API also calls invalidate(), which drops every entry
+at once, and late inserts from queries still running against the old
+version can never be hit.
+
+The cache holds at most max_entries results; inserting beyond that evicts
+the least recently used entry. With max_age set, an entry older than
+max_age seconds is dropped when it is looked up and counted as expired;
+catalog changes never need it (the version key covers them), so it only
+bounds how long a result lives. get / put are guarded by a lock, so worker
+threads can share one cache with the event loop. Hit, miss, eviction,
+expiry and invalidation counters are reported by stats().
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_DECIMALS = 6  # ~0.1 m in latitude
+MISSING = object()
+
+
+class QueryCache:
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, decimals: int = DEFAULT_DECIMALS,
+                 max_age: float | None = None):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be positive")
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, version: str, kind: str, args: tuple) -> tuple:
+        """Cache key; float arguments are rounded to the cache precision."""
+        return version, kind, tuple(round(a, self.decimals) if isinstance(a, float) else a for a in args)
+
+    def get(self, key: tuple, default=MISSING):
+        with self._lock:
+            try:
+                stored, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.max_age is not None and time.monotonic() - stored > self.max_age:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry (the catalog changed)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_age": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
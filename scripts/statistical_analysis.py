@@ -1,70 +1,208 @@
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
 import pandas as pd
 import numpy as np
-import scipy.stats as stats
-import matplotlib.pyplot as plt
-
-# Define paths
-repo_root = os.getcwd()
-data_dir = os.path.join(repo_root, "data")
-
-# Load the Monte Carlo results dataset
-input_csv_path = os.path.join(data_dir, "mc_simulation_results.csv")
-
-if not os.path.exists(input_csv_path):
-    print(f"❌ Error: Monte Carlo results file not found at {input_csv_path}")
-    exit()
-
-df = pd.read_csv(input_csv_path)
-
-# Check if the dataset contains valid data
-if df.empty:
-    print("❌ Error: The dataset is empty. No statistical analysis can be performed.")
-    exit()
-
-# Basic descriptive statistics
-summary_stats = df.describe()
-
-# Compute additional statistics
-median_alignments = np.median(df["Number_of_Alignments"])
-mode_alignments = stats.mode(df["Number_of_Alignments"], keepdims=True)[0][0]
-variance = np.var(df["Number_of_Alignments"])
-skewness = stats.skew(df["Number_of_Alignments"])
-kurtosis = stats.kurtosis(df["Number_of_Alignments"])
-
-# Combine results into a DataFrame
-extended_stats = pd.DataFrame({
-    "Statistic": ["Mean", "Median", "Mode", "Variance", "Standard Deviation", "Skewness", "Kurtosis"],
-    "Value": [
-        summary_stats.loc["mean", "Number_of_Alignments"],
-        median_alignments,
-        mode_alignments,
-        variance,
-        summary_stats.loc["std", "Number_of_Alignments"],
-        skewness,
-        kurtosis
-    ]
-})
-
-# Save statistical results to a CSV file
-output_csv_path = os.path.join(data_dir, "statistical_results.csv")
-extended_stats.to_csv(output_csv_path, index=False)
-
-# Print DataFrame before saving to CSV
-print("Statistical DataFrame Preview:")
-print(extended_stats.head())  # Check first few rows
-
-df.to_csv("/content/HIA-Geodetic-Codex/data/statistical_results.csv", index=False)
-print("✅ Data written successfully.")
-print(f"✅ Statistical analysis results saved to {output_csv_path}")
-
-# Generate histogram for visualization
-plt.figure(figsize=(8, 5))
-plt.hist(df["Number_of_Alignments"], bins=50, color="blue", alpha=0.7, label="Monte Carlo Alignments")
-plt.axvline(summary_stats.loc["mean", "Number_of_Alignments"], color="red", linestyle="dashed", label="Mean Alignment Count")
-plt.xlabel("Number of Alignments")
-plt.ylabel("Frequency")
-plt.title("Monte Carlo Simulation: Distribution of Site Alignments")
-plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+
+from monte_carlo_simulation import DEFAULT_DATA_DIR, load_histogram
+from streaming_stats import IntegerHistogram, batch_statistics, stream_column, summary_statistics
+
+CI_METHODS = ("percentile", "jackknife")
+BOOTSTRAP_BLOCK = 500
+
+try:
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+
+def histogram_statistics(hist):
+    """
+    Summary statistics of the alignment counts, computed from the count
+    histogram (entry k = number of trials with k alignments) in one pass.
+
+    Conventions match the per-row pandas/scipy calls they replace: variance
+    is the population variance (np.var), standard deviation is the sample
+    one (DataFrame.describe), skewness and kurtosis are the biased Fisher
+    estimates (scipy.stats defaults), and the mode is the smallest most
+    frequent value.
+    """
+    return IntegerHistogram(hist).statistics()
+
+
+def _bootstrap_block(task):
+    """
+    Worker entry point: n_resamples multinomial resamples of the histogram
+    (the same as resampling the trials with replacement) and the statistics
+    of each, as a dict of arrays.
+    """
+    hist, seed, n_resamples = task
+    rng = np.random.default_rng(seed)
+    n = int(hist.sum())
+    return batch_statistics(rng.multinomial(n, hist / n, size=n_resamples))
+
+
+def bootstrap_statistics(hist, n_resamples=2000, seed=None, workers=1):
+    """
+    Bootstrap replicates of every statistic, drawn in blocks of
+    BOOTSTRAP_BLOCK resamples. Each block has its own stream spawned from
+    SeedSequence(seed), so results depend on the seed only, not on the
+    number of workers.
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    sizes = [min(BOOTSTRAP_BLOCK, n_resamples - i) for i in range(0, n_resamples, BOOTSTRAP_BLOCK)]
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(hist, child, size) for child, size in zip(children, sizes)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_bootstrap_block, tasks))
+    else:
+        blocks = [_bootstrap_block(task) for task in tasks]
+    return {name: np.concatenate([b[name] for b in blocks]) for name in blocks[0]}
+
+
+def jackknife_standard_errors(hist):
+    """
+    Delete-one jackknife standard error of every statistic. Leaving out one
+    trial only depends on its alignment count, so the n leave-one-out
+    replicates collapse to one per occupied histogram bin.
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    occupied = np.flatnonzero(hist)
+    weights = hist[occupied].astype(np.float64)
+    n = weights.sum()
+    replicates = np.repeat(hist[None, :], occupied.size, axis=0)
+    replicates[np.arange(occupied.size), occupied] -= 1
+    errors = {}
+    for name, theta in batch_statistics(replicates).items():
+        if np.any(np.isnan(theta)):
+            errors[name] = np.nan
+            continue
+        theta_bar = (weights * theta).sum() / n
+        errors[name] = np.sqrt((n - 1) / n * (weights * (theta - theta_bar) ** 2).sum())
+    return errors
+
+
+def confidence_intervals(hist, stats_by_name, method="percentile", confidence=0.95,
+                         n_resamples=2000, seed=None, workers=1):
+    """
+    Standard error and CI of every statistic: percentile bootstrap over
+    multinomial resamples of the histogram, or jackknife SE with a normal
+    interval around the point estimate.
+    """
+    alpha = 1.0 - confidence
+    if method == "jackknife":
+        z = NormalDist().inv_cdf(1.0 - alpha / 2)
+        errors = jackknife_standard_errors(hist)
+        return {name: (errors[name], value - z * errors[name], value + z * errors[name])
+                for name, value in stats_by_name.items()}
+    replicates = bootstrap_statistics(hist, n_resamples, seed, workers)
+    out = {}
+    for name, theta in replicates.items():
+        theta = theta[~np.isnan(theta)]
+        if theta.size == 0:
+            out[name] = (np.nan, np.nan, np.nan)
+            continue
+        lo, hi = np.percentile(theta, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        out[name] = (theta.std(ddof=1) if theta.size > 1 else np.nan, lo, hi)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Summary statistics of the Monte Carlo alignment counts.")
+    ap.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    ap.add_argument("--input", default=None,
+                    help="Histogram JSON or per-trial CSV (default: <data-dir>/mc_simulation_histogram.json, "
+                         "falling back to mc_simulation_results.csv)")
+    ap.add_argument("--column", default="Number_of_Alignments", help="Per-trial CSV column")
+    ap.add_argument("--chunksize", type=int, default=1_000_000,
+                    help="CSV rows held in memory at a time; inputs of any size are streamed")
+    ap.add_argument("--out", default=None, help="Output CSV (default: <data-dir>/statistical_results.csv)")
+    ap.add_argument("--ci-method", choices=CI_METHODS, default="percentile",
+                    help="percentile bootstrap over the histogram, or delete-one jackknife")
+    ap.add_argument("--bootstrap", type=int, default=2000, help="Bootstrap resamples (0 = no intervals)")
+    ap.add_argument("--confidence", type=float, default=0.95)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=1, help="Process-pool size for the bootstrap")
+    ap.add_argument("--no-plot", action="store_true")
+    args = ap.parse_args(argv)
+
+    # Define paths
+    data_dir = os.path.abspath(args.data_dir)
+    input_path = args.input or os.path.join(data_dir, "mc_simulation_histogram.json")
+    if args.input is None and not os.path.exists(input_path):
+        input_path = os.path.join(data_dir, "mc_simulation_results.csv")
+
+    if not os.path.exists(input_path):
+        print(f"❌ Error: Monte Carlo results file not found at {input_path}")
+        return 1
+
+    # Histogram JSON is already reduced; per-trial CSVs are streamed in chunks
+    if input_path.endswith(".csv"):
+        try:
+            moments, histogram = stream_column(input_path, args.column, args.chunksize)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            return 1
+        if histogram is None:
+            print(f"🔍 {args.column} holds non-integer values: median, mode and intervals need integer "
+                  "counts and are left out")
+    else:
+        histogram = IntegerHistogram(load_histogram(input_path)[0])
+        if histogram.counts.ndim != 1:
+            print("❌ Error: threshold sweeps are summarized in mc_threshold_sweep.csv")
+            return 1
+        moments = histogram.moments()
+
+    # Check if the dataset contains valid data
+    if moments.n == 0:
+        print("❌ Error: The dataset is empty. No statistical analysis can be performed.")
+        return 1
+
+    stats_by_name = summary_statistics(moments, histogram)
+
+    # Combine results into a DataFrame
+    extended_stats = pd.DataFrame({
+        "Statistic": list(stats_by_name),
+        "Value": list(stats_by_name.values()),
+    })
+
+    # Uncertainty of every statistic, resampling the histogram (not the rows)
+    if histogram is not None and (args.ci_method == "jackknife" or args.bootstrap > 0):
+        intervals = confidence_intervals(histogram.counts, stats_by_name, args.ci_method, args.confidence,
+                                         args.bootstrap, args.seed, args.workers)
+        extended_stats["Std Error"] = [intervals[name][0] for name in stats_by_name]
+        extended_stats["CI Low"] = [intervals[name][1] for name in stats_by_name]
+        extended_stats["CI High"] = [intervals[name][2] for name in stats_by_name]
+        extended_stats["CI Method"] = args.ci_method
+        extended_stats["CI Level"] = args.confidence
+
+    # Print DataFrame before saving to CSV
+    print("Statistical DataFrame Preview:")
+    print(extended_stats)
+
+    # Save statistical results to a CSV file
+    output_csv_path = args.out or os.path.join(data_dir, "statistical_results.csv")
+    extended_stats.to_csv(output_csv_path, index=False)
+    print(f"✅ Statistical analysis results saved to {output_csv_path}")
+
+    if plt is None or args.no_plot or histogram is None:
+        return 0
+
+    # Generate histogram for visualization
+    hist = histogram.counts
+    plt.figure(figsize=(8, 5))
+    plt.bar(np.arange(hist.size), hist, width=1.0, color="blue", alpha=0.7, label="Monte Carlo Alignments")
+    plt.axvline(stats_by_name["Mean"], color="red", linestyle="dashed", label="Mean Alignment Count")
+    plt.xlabel("Number of Alignments")
+    plt.ylabel("Frequency")
+    plt.title("Monte Carlo Simulation: Distribution of Site Alignments")
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
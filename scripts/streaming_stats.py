@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+One-pass (streaming) summary statistics for Monte Carlo outputs.
+
+- OnlineMoments     : count, mean and central moment sums M2..M4, updated
+                      one chunk at a time. Each chunk is reduced with NumPy
+                      and merged with Pebay's pairwise update formulas (the
+                      chunked form of Welford's algorithm), so the result
+                      does not depend on how the data is split and partial
+                      results from different workers can be merged.
+- IntegerHistogram  : exact counts of non-negative integer values (the
+                      alignment counts), growing as larger values arrive;
+                      gives the exact median and mode and, through
+                      OnlineMoments, every moment.
+- stream_column     : feeds one column of a CSV of any size through both,
+                      chunksize rows at a time.
+- batch_statistics  : the same statistics for a stack of histograms at
+                      once (bootstrap / jackknife replicates).
+
+Conventions match statistical_analysis.py: population variance, sample
+standard deviation, biased (Fisher) skewness and excess kurtosis, smallest
+most frequent value as the mode.
+"""
+
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+
+class OnlineMoments:
+
+    def __init__(self):
+        self.n = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, values, weights=None) -> "OnlineMoments":
+        """Add a chunk of values (optionally with integer weights / frequencies)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=np.float64).ravel()
+        n = weights.sum()
+        if n == 0:
+            return self
+        chunk = OnlineMoments()
+        chunk.n = n
+        chunk.mean = (weights * values).sum() / n
+        dev = values - chunk.mean
+        dev2 = dev * dev
+        chunk.m2 = (weights * dev2).sum()
+        chunk.m3 = (weights * dev2 * dev).sum()
+        chunk.m4 = (weights * dev2 * dev2).sum()
+        return self.merge(chunk)
+
+    def merge(self, other: "OnlineMoments") -> "OnlineMoments":
+        """Combine with the moments of another partition (Pebay 2008, eq. 2.1-2.3)."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.m3, self.m4 = other.n, other.mean, other.m2, other.m3, other.m4
+            return self
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        d_n = delta / n
+        m2 = self.m2 + other.m2 + delta * d_n * na * nb
+        m3 = (self.m3 + other.m3 + delta * d_n * d_n * na * nb * (na - nb)
+              + 3.0 * d_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4 + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6.0 * d_n * d_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4.0 * d_n * (na * other.m3 - nb * self.m3))
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, self.mean + d_n * nb, m2, m3, m4
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n > 0 else np.nan
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    @property
+    def skewness(self) -> float:
+        return np.sqrt(self.n) * self.m3 / self.m2 ** 1.5 if self.m2 > 0 else np.nan
+
+    @property
+    def kurtosis(self) -> float:
+        return self.n * self.m4 / self.m2 ** 2 - 3.0 if self.m2 > 0 else np.nan
+
+
+class IntegerHistogram:
+
+    def __init__(self, counts=None):
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+
+    def update(self, values) -> "IntegerHistogram":
+        values = np.asarray(values).ravel()
+        if values.size == 0:
+            return self
+        as_int = values.astype(np.int64)
+        if np.any(as_int != values) or as_int.min() < 0:
+            raise ValueError("IntegerHistogram only accepts non-negative integer values")
+        chunk = np.bincount(as_int)
+        if chunk.size > self.counts.size:
+            self.counts = np.pad(self.counts, (0, chunk.size - self.counts.size))
+        self.counts[:chunk.size] += chunk
+        return self
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def median(self) -> float:
+        """Exact median: average of the two middle order statistics."""
+        n = self.n
+        if n == 0:
+            return np.nan
+        cum = np.cumsum(self.counts)
+        lo = np.searchsorted(cum, (n - 1) // 2, side="right")
+        hi = np.searchsorted(cum, n // 2, side="right")
+        return (lo + hi) / 2
+
+    def mode(self) -> float:
+        return float(np.argmax(self.counts)) if self.n else np.nan
+
+    def moments(self) -> OnlineMoments:
+        return OnlineMoments().update(np.arange(self.counts.size), self.counts)
+
+    def statistics(self) -> dict:
+        return summary_statistics(self.moments(), self)
+
+
+def summary_statistics(moments: OnlineMoments, histogram: IntegerHistogram | None = None) -> dict:
+    """The extended_stats table as a dict; median and mode need the histogram."""
+    return {
+        "Mean": moments.mean if moments.n else np.nan,
+        "Median": histogram.median() if histogram is not None else np.nan,
+        "Mode": histogram.mode() if histogram is not None else np.nan,
+        "Variance": moments.variance,
+        "Standard Deviation": moments.std,
+        "Skewness": moments.skewness,
+        "Kurtosis": moments.kurtosis,
+    }
+
+
+def stream_column(path: str, column: str, chunksize: int = 1_000_000,
+                  integer: bool = True) -> tuple[OnlineMoments, IntegerHistogram | None]:
+    """
+    One pass over a CSV column, chunksize rows in memory at a time. With
+    integer=True the values are also histogrammed (exact median and mode),
+    and the moments are taken from that histogram at the end. The first
+    chunk holding a non-integer (or negative) value switches the pass to
+    integer=False: the histogram so far is folded into the moments and
+    None is returned in its place.
+    """
+    moments = OnlineMoments()
+    histogram = IntegerHistogram() if integer else None
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+        values = chunk[column].dropna().to_numpy()
+        if histogram is not None:
+            try:
+                histogram.update(values)
+                continue
+            except ValueError:
+                moments, histogram = histogram.moments(), None
+        moments.update(values)
+    if histogram is not None:
+        moments = histogram.moments()
+    return moments, histogram
+
+
+def batch_statistics(hists: np.ndarray) -> dict:
+    """summary_statistics of every row of a (replicates, values) histogram stack, as arrays."""
+    hists = np.asarray(hists, dtype=np.float64)
+    values = np.arange(hists.shape[1], dtype=np.float64)
+    n = hists.sum(axis=1)
+    mean = hists @ values / n
+    dev = values - mean[:, None]
+    dev2 = dev * dev
+    m2 = (hists * dev2).sum(axis=1) / n
+    m3 = (hists * dev2 * dev).sum(axis=1) / n
+    m4 = (hists * dev2 * dev2).sum(axis=1) / n
+    cum = np.cumsum(hists, axis=1)
+    lo = (cum <= ((n - 1) // 2)[:, None]).sum(axis=1)
+    hi = (cum <= (n // 2)[:, None]).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "Mean": mean,
+            "Median": (lo + hi) / 2,
+            "Mode": np.argmax(hists, axis=1).astype(np.float64),
+            "Variance": m2,
+            "Standard Deviation": np.sqrt(m2 * n / (n - 1)),
+            "Skewness": np.where(m2 > 0, m3 / m2 ** 1.5, np.nan),
+            "Kurtosis": np.where(m2 > 0, m4 / m2 ** 2 - 3.0, np.nan),
+        }
@@ -29,6 +29,30 @@ spec = importlib.util.spec_from_file_location("polyhedral_mesh", DST)
 pm = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(pm)
 
+# Shared geodesy helpers from a repo checkout (scripts/geodesy.py next to this
+# file, or a clone in the working directory / under /content); never fetched
+# at runtime, so the code that runs is the code checked out
+GEO_DIRS = [os.path.dirname(os.path.abspath(globals().get("__file__", "."))),
+            os.path.join(os.getcwd(), "scripts"), os.getcwd(),
+            "/content/HIA-Geodetic-Codex/scripts"]
+GEO_SRC = next((p for p in (os.path.join(d, "geodesy.py") for d in GEO_DIRS) if os.path.exists(p)), None)
+if GEO_SRC is not None:
+    geo_spec = importlib.util.spec_from_file_location("geodesy", GEO_SRC)
+    geo = importlib.util.module_from_spec(geo_spec)
+    geo_spec.loader.exec_module(geo)
+    print("Using geodesy helpers from:", GEO_SRC)
+
+    def gc_miles(lon1, lat1, lon2, lat2):
+        """Great-circle distance in miles on the mean-radius sphere (lon, lat order; arrays OK)."""
+        return geo.haversine_km(lat1, lon1, lat2, lon2) / geo.KM_PER_MILE
+else:
+    # No checkout (plain Colab): the same mean-sphere haversine inline
+    def gc_miles(lon1, lat1, lon2, lat2):
+        """Great-circle distance in miles on the mean-radius sphere (lon, lat order; arrays OK)."""
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+        return 2 * 6371.0088 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) / 1.609344
+
 # --- Cell 3 (revised): robust V3 geodesic mesh builder (no off-by-one) ---
 import numpy as np
 
@@ -309,7 +333,6 @@ plt.show()
 
 # --- Cell 8: V2 distance report (+ safe rebuild) ---
 
-import math
 import pandas as pd
 
 # 0) Target edge length for your V2 “about 3,965 mi” sanity check
@@ -324,15 +347,7 @@ except NameError as e:
         "UP_LABELS, DOWN_LABEL, and NODES before this one."
     ) from e
 
-# 2) Great-circle distance in miles (WGS84-ish)
-def gc_miles(lon1, lat1, lon2, lat2):
-    R_km = 6371.0088
-    d2r  = math.pi / 180.0
-    q1, q2 = lat1*d2r, lat2*d2r
-    d_lon  = (lon2 - lon1) * d2r
-    a = math.sin((lat2-lat1)*d2r/2)**2 + math.cos(q1)*math.cos(q2)*math.sin(d_lon/2)**2
-    c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return (R_km*c * 0.621371)  # miles
+# 2) Great-circle distance in miles: gc_miles from Cell 2 (shared geodesy module)
 
 # 3) Build the trihedral pairs if missing
 try:
@@ -511,19 +526,8 @@ def draw_kml_geoms(geoms, ax, color='purple', lw=2.0, point_size=40, label=False
 # plt.show()
 
 # --- Cell B: sanity check V2 great-circle distances (miles) ---
-import math
-
-EARTH_R_MI = 3958.7613  # mean radius in miles
 
-def gc_distance_miles(lon1, lat1, lon2, lat2):
-    # haversine / great-circle on sphere
-    φ1, λ1 = math.radians(lat1), math.radians(lon1)
-    φ2, λ2 = math.radians(lat2), math.radians(lon2)
-    dφ = φ2 - φ1
-    dλ = λ2 - λ1
-    a = math.sin(dφ/2)**2 + math.cos(φ1)*math.cos(φ2)*math.sin(dλ/2)**2
-    c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return EARTH_R_MI * c
+# haversine / great-circle on sphere: gc_miles from Cell 2
 
 # Define your V2 anchors (same as in the plots)
 V2 = {
@@ -536,21 +540,20 @@ V2 = {
 pairs = [("MHO","GZP"), ("MHO","ACO"), ("CPO","ACO")]  # the “up” edges you drew
 for a,b in pairs:
     (lon1,lat1),(lon2,lat2) = V2[a], V2[b]
-    d = gc_distance_miles(lon1,lat1,lon2,lat2)
+    d = gc_miles(lon1,lat1,lon2,lat2)
     print(f"{a} → {b}: {d:,.1f} miles")
 
 # If you expect ~3,965 mi for specific legs, this will show the deltas explicitly:
 TARGET = 3965.0
 for a,b in pairs:
     (lon1,lat1),(lon2,lat2) = V2[a], V2[b]
-    d = gc_distance_miles(lon1,lat1,lon2,lat2)
+    d = gc_miles(lon1,lat1,lon2,lat2)
     print(f"{a} → {b}: Δ={d - TARGET:+.1f} mi (actual {d:.1f})")
 
 # --- Cell C: Build a V2 atlas (nodes+edges) from your KML/KMZ files ---
 import pandas as pd
 from shapely.geometry import Point, LineString
 from shapely.ops import nearest_points
-from math import radians, sin, cos, atan2, sqrt
 import numpy as np
 
 # Reuse loader from Cell A
@@ -577,14 +580,7 @@ def atlas_from_kml(paths, min_name_len=2):
     nodes = pd.DataFrame(pts).drop_duplicates(subset=["name"])
     return nodes, lines
 
-# small geodesic helper (miles)
-EARTH_R_MI = 3958.7613
-def gc_miles(lon1, lat1, lon2, lat2):
-    φ1, λ1 = radians(lat1), radians(lon1)
-    φ2, λ2 = radians(lat2), radians(lon2)
-    dφ, dλ = φ2-φ1, λ2-λ1
-    a = sin(dφ/2)**2 + cos(φ1)*cos(φ2)*sin(dλ/2)**2
-    return 2*EARTH_R_MI*atan2(sqrt(a), sqrt(1-a))
+# small geodesic helper (miles): gc_miles from Cell 2
 
 # 2) Snap LineStrings to nearest endpoints in nodes to infer edges
 def edges_from_lines(nodes_df, lines, snap_km=50):
@@ -1,16 +1,9 @@
-from math import radians, cos, sin, asin, sqrt
+import os, sys
 import pandas as pd
 import ace_tools as tools
 
-# Define Haversine function
-def haversine(lon1, lat1, lon2, lat2):
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a)) 
-    r = 3958.8  # Radius of Earth in miles
-    return c * r
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from geodesy import KM_PER_MILE, inverse
 
 # Node coordinates
 codex_nodes = {
@@ -21,14 +14,14 @@ codex_nodes = {
     "Chiribiquete (Patio Bonito)": (0.719, -72.45)  # New node A41
 }
 
-# Calculate distances
-chiribiquete_lat, chiribiquete_lon = codex_nodes["Chiribiquete (Patio Bonito)"]
-distances = {
-    name: round(haversine(chiribiquete_lon, chiribiquete_lat, lon, lat), 2)
-    for name, (lat, lon) in codex_nodes.items()
-    if name != "Chiribiquete (Patio Bonito)"
-}
+# Calculate WGS84 distances from Chiribiquete to every other node in one call
+origin = "Chiribiquete (Patio Bonito)"
+chiribiquete_lat, chiribiquete_lon = codex_nodes[origin]
+others = {name: coords for name, coords in codex_nodes.items() if name != origin}
+lat, lon = zip(*others.values())
+distance_km, _, _ = inverse(chiribiquete_lat, chiribiquete_lon, lat, lon)
+distances = dict(zip(others, (distance_km / KM_PER_MILE).round(2)))
 
 # Display
 df = pd.DataFrame(distances.items(), columns=["Node", "Distance from Chiribiquete (mi)"])
-tools.display_dataframe_to_user(name="Codex Node Distances from Chiribiquete", dataframe=df)
\ No newline at end of file
+tools.display_dataframe_to_user(name="Codex Node Distances from Chiribiquete", dataframe=df)